@@ -13,14 +13,40 @@ Implementation Guide:
 4. State Management:
    - Maintain conversation history.
    - Update 'AgentSession' state in real-time.
+5. Scheduling:
+   - start_outbound_calls() is the batch entry point for scheduled jobs.
+     Questions are precomputed per patient and all greetings are generated
+     concurrently before the calls are placed.
 """
 
-def start_outbound_call(patient_profile):
-    # TODO: Initialize LiveKit Room
+import asyncio
+from typing import List
+
+from agents.checkin_agent import get_checkin_agent, CheckinResponse
+from agents.elevenlabs_agent import get_precomputed_questions
+
+
+async def start_outbound_calls(patient_ids: List[str], window_hours: int = 84) -> List[CheckinResponse]:
+    """Prepare check-in conversations for a batch of patients (scheduled job entry point)."""
+    # Question precompute reads the store (blocking), so run it off the event
+    # loop for all patients at once
+    precomputed = await asyncio.gather(*(
+        asyncio.to_thread(get_precomputed_questions, patient_id, window_hours=window_hours)
+        for patient_id in patient_ids
+    ))
+    jobs = [(patient_id, result.questions) for patient_id, result in zip(patient_ids, precomputed)]
+    responses = await get_checkin_agent().start_conversations_bulk(jobs)
+    
+    # TODO: Initialize LiveKit Room per patient
     # room = livekit.create_room()
     
-    # TODO: Connect AI Participant
+    # TODO: Connect AI Participant and speak response.text as the opening line
     # ai_participant = room.connect_agent()
     
-    pass
+    return responses
+
+
+async def start_outbound_call(patient_profile) -> CheckinResponse:
+    responses = await start_outbound_calls([patient_profile.id])
+    return responses[0]
 
@@ -10,10 +10,33 @@ Implementation Guide:
    - Mood/Anxiety levels.
    - Social support availability.
    - Goal progress (e.g. "Did you walk the dog?").
+4. Scheduling:
+   - start_wellness_calls() is the batch entry point for scheduled jobs; like
+     the symptom check-ins, all greetings are generated concurrently.
 """
 
-def start_wellness_call(patient_profile):
-    # TODO: Initialize LiveKit Room
+import asyncio
+from typing import List
+
+from agents.checkin_agent import get_checkin_agent, CheckinResponse
+from agents.elevenlabs_agent import get_precomputed_questions
+
+
+async def start_wellness_calls(patient_ids: List[str], window_hours: int = 84) -> List[CheckinResponse]:
+    """Prepare wellness check-in conversations for a batch of patients (scheduled job entry point)."""
+    precomputed = await asyncio.gather(*(
+        asyncio.to_thread(get_precomputed_questions, patient_id, window_hours=window_hours)
+        for patient_id in patient_ids
+    ))
+    jobs = [(patient_id, result.questions) for patient_id, result in zip(patient_ids, precomputed)]
+    responses = await get_checkin_agent().start_conversations_bulk(jobs)
+    
+    # TODO: Initialize LiveKit Room per patient
     # ...
-    pass
+    
+    return responses
+
 
+async def start_wellness_call(patient_profile) -> CheckinResponse:
+    responses = await start_wellness_calls([patient_profile.id])
+    return responses[0]
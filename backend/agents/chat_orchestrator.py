@@ -8,67 +8,194 @@ This is where we will eventually plug in:
 2. LangFuse for tracing/observability
 3. LangGraph for state management (Safety Check -> Chief Complaint -> Drill Down)
 
-For now, it implements a simple mock turn-based logic.
+For now, it implements a simple mock turn-based logic, driven by per-agent
+transition tables. When langgraph is installed the same tables compile to a
+checkpointed StateGraph (see run_chat_turn) so sessions resume server-side.
 """
 
-from typing import Dict, List, Optional
-from pydantic import BaseModel
+import os
+import re
+import operator
+import sqlite3
+import threading
+from typing import Annotated, Any, Callable, Dict, List, Optional, Tuple, TypedDict, Union
+from pydantic import BaseModel, Field
+
+try:
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.checkpoint.sqlite import SqliteSaver
+    LANGGRAPH_AVAILABLE = True
+except ImportError:
+    LANGGRAPH_AVAILABLE = False
 
 class ChatState(BaseModel):
-    messages: List[Dict[str, str]] = []
-    context: Dict = {}
+    messages: List[Dict[str, str]] = Field(default_factory=list)
+    context: Dict = Field(default_factory=dict)
     current_step: str = "greeting" 
     # Steps: greeting -> safety_screen -> chief_complaint -> drill_down -> closing
 
+class ChatTurnResponse(BaseModel):
+    response: str
+    updated_state: ChatState
+
+Transition = Union[Tuple[str, Optional[str]], Callable[[str, ChatState], Tuple[str, Optional[str]]]]
+
+# ============================================================================
+# Transition Tables
+# ============================================================================
+# Each step maps to either a (response, next_step) tuple or a callable
+# (message, state) -> (response, next_step). A next_step of None keeps the
+# current step. Keyword checks use precompiled word-boundary regexes, so
+# "yesterday" or "eyes" never count as a yes and no lowered copy is needed.
+
+_AFFIRMATIVE_RE = re.compile(r"\b(yes|yeah|yep|yup|affirmative|correct)\b", re.IGNORECASE)
+
+def _symptom_safety_screen(message: str, state: ChatState) -> Tuple[str, Optional[str]]:
+    if _AFFIRMATIVE_RE.search(message):
+        return "Please hang up and call 911 immediately. This requires urgent attention.", "terminated"
+    return "Glad to hear that. Tell me more about your headache. On a scale of 0-10, how severe is it currently?", "severity_check"
+
+_TRANSITIONS: Dict[str, Dict[str, Transition]] = {
+    "ai_symptom": {
+        "greeting": ("I noticed you reported a headache yesterday. Before we continue, are you experiencing any chest pain or shortness of breath right now?", "safety_screen"),
+        "safety_screen": _symptom_safety_screen,
+        "severity_check": ("Understood. Has this stopped you from doing your normal daily activities?", "impact_check"),
+        "impact_check": ("Thank you for sharing. I've logged these details. A nurse will review this shortly. Is there anything else?", "closing"),
+    },
+    "ai_wellness": {
+        "greeting": ("Good morning. Just checking in on your goal to walk the dog. Did you manage to get out this week?", "goal_check"),
+        "goal_check": ("That's great context. How have you been feeling emotionally? Any anxiety about your upcoming scan?", "mood_check"),
+    },
+}
+
+# Fallback when the current step has no entry for the agent
+_DEFAULT_TRANSITIONS: Dict[str, Transition] = {
+    "ai_symptom": ("Take care.", None),
+    "ai_wellness": ("Thanks for chatting. I'll update your wellness profile.", "closing"),
+}
+
+_NO_TRANSITION: Transition = ("", None)
+
+
+def _turn_messages(message: str, response: str) -> List[Dict[str, str]]:
+    return [{"role": "user", "content": message}, {"role": "assistant", "content": response}]
+
+
 def process_chat_message(message: str, state: ChatState, agent_type: str):
     """
     Mock Logic Engine to simulate the agent flow.
     """
-    response = ""
-    next_step = state.current_step
+    transition = _TRANSITIONS.get(agent_type, {}).get(
+        state.current_step,
+        _DEFAULT_TRANSITIONS.get(agent_type, _NO_TRANSITION)
+    )
+    if callable(transition):
+        response, next_step = transition(message, state)
+    else:
+        response, next_step = transition
     
-    if agent_type == "ai_symptom":
-        if state.current_step == "greeting":
-            response = "I noticed you reported a headache yesterday. Before we continue, are you experiencing any chest pain or shortness of breath right now?"
-            next_step = "safety_screen"
-        
-        elif state.current_step == "safety_screen":
-            if "yes" in message.lower():
-                response = "Please hang up and call 911 immediately. This requires urgent attention."
-                next_step = "terminated"
-            else:
-                response = "Glad to hear that. Tell me more about your headache. On a scale of 0-10, how severe is it currently?"
-                next_step = "severity_check"
-        
-        elif state.current_step == "severity_check":
-            response = "Understood. Has this stopped you from doing your normal daily activities?"
-            next_step = "impact_check"
-            
-        elif state.current_step == "impact_check":
-            response = "Thank you for sharing. I've logged these details. A nurse will review this shortly. Is there anything else?"
-            next_step = "closing"
-            
-        else:
-            response = "Take care."
-
-    elif agent_type == "ai_wellness":
-        if state.current_step == "greeting":
-            response = "Good morning. Just checking in on your goal to walk the dog. Did you manage to get out this week?"
-            next_step = "goal_check"
-        elif state.current_step == "goal_check":
-            response = "That's great context. How have you been feeling emotionally? Any anxiety about your upcoming scan?"
-            next_step = "mood_check"
-        else:
-            response = "Thanks for chatting. I'll update your wellness profile."
-            next_step = "closing"
-            
     # Update State
-    state.messages.append({"role": "user", "content": message})
-    state.messages.append({"role": "assistant", "content": response})
-    state.current_step = next_step
+    state.messages.extend(_turn_messages(message, response))
+    if next_step is not None:
+        state.current_step = next_step
     
-    return {
-        "response": response,
-        "updated_state": state.dict()
-    }
+    # Return the model itself; the endpoint's response_model serializes it once
+    return ChatTurnResponse(response=response, updated_state=state)
+
+
+# ============================================================================
+# LangGraph Compilation (optional)
+# ============================================================================
+# The transition tables above compile to one StateGraph per agent type: a
+# conditional edge from START routes on current_step to a node per step.
+# With a SQLite checkpointer keyed by session, a client only sends the new
+# message - history and current_step are restored from the checkpoint.
+
+class AgentState(TypedDict, total=False):
+    messages: Annotated[List[Dict[str, str]], operator.add]
+    context: Dict
+    current_step: str
+
 
+CHAT_CHECKPOINT_DB = os.getenv(
+    "CHAT_CHECKPOINT_DB",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chat_checkpoints.db")
+)
+
+_FALLBACK_NODE = "fallback"
+_graphs: Dict[str, Any] = {}
+_graphs_lock = threading.Lock()
+_checkpointer = None
+
+
+def _step_node(transition: Transition):
+    """Wrap a transition table entry as a graph node."""
+    def node(state: AgentState) -> Dict[str, Any]:
+        message = state["messages"][-1]["content"]
+        if callable(transition):
+            chat_state = ChatState.model_construct(
+                messages=state["messages"],
+                context=state.get("context", {}),
+                current_step=state.get("current_step", "greeting")
+            )
+            response, next_step = transition(message, chat_state)
+        else:
+            response, next_step = transition
+        
+        update: Dict[str, Any] = {"messages": [{"role": "assistant", "content": response}]}
+        if next_step is not None:
+            update["current_step"] = next_step
+        return update
+    return node
+
+
+def _build_chat_graph(agent_type: str, checkpointer):
+    steps = _TRANSITIONS.get(agent_type, {})
+    builder = StateGraph(AgentState)
+    
+    for step, transition in steps.items():
+        builder.add_node(step, _step_node(transition))
+    builder.add_node(_FALLBACK_NODE, _step_node(_DEFAULT_TRANSITIONS.get(agent_type, _NO_TRANSITION)))
+    
+    def route(state: AgentState) -> str:
+        step = state.get("current_step", "greeting")
+        return step if step in steps else _FALLBACK_NODE
+    
+    nodes = [*steps, _FALLBACK_NODE]
+    builder.add_conditional_edges(START, route, nodes)
+    for node in nodes:
+        builder.add_edge(node, END)
+    
+    return builder.compile(checkpointer=checkpointer)
+
+
+def get_chat_graph(agent_type: str):
+    """Get (or lazily compile) the checkpointed graph for an agent type."""
+    global _checkpointer
+    if not LANGGRAPH_AVAILABLE:
+        raise ValueError("LangGraph not installed. Install with: pip install langgraph langgraph-checkpoint-sqlite")
+    
+    with _graphs_lock:
+        if _checkpointer is None:
+            _checkpointer = SqliteSaver(sqlite3.connect(CHAT_CHECKPOINT_DB, check_same_thread=False))
+        if agent_type not in _graphs:
+            _graphs[agent_type] = _build_chat_graph(agent_type, _checkpointer)
+        return _graphs[agent_type]
+
+
+def run_chat_turn(message: str, agent_type: str, session_id: str) -> ChatTurnResponse:
+    """
+    Process one turn through the compiled graph, resuming from the session checkpoint.
+    """
+    graph = get_chat_graph(agent_type)
+    result = graph.invoke(
+        {"messages": [{"role": "user", "content": message}]},
+        config={"configurable": {"thread_id": f"{agent_type}:{session_id}"}}
+    )
+    
+    state = ChatState(
+        messages=result["messages"],
+        context=result.get("context", {}),
+        current_step=result.get("current_step", "greeting")
+    )
+    return ChatTurnResponse(response=result["messages"][-1]["content"], updated_state=state)
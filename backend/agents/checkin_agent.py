@@ -6,17 +6,17 @@ Designed to walk patients through precomputed check-in questions and log respons
 """
 
 import os
-import json
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+import asyncio
+import importlib.util
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
+from cachetools import TTLCache
+import orjson
 
-try:
-    from anthropic import Anthropic
-    ANTHROPIC_AVAILABLE = True
-except ImportError:
-    ANTHROPIC_AVAILABLE = False
-    Anthropic = None
+# anthropic (and httpx beneath it) is only imported when the first check-in
+# actually needs a client, so workers serving other routes never load it
+ANTHROPIC_AVAILABLE = importlib.util.find_spec("anthropic") is not None
 
 # Load environment variables from .env file if available
 try:
@@ -25,12 +25,13 @@ try:
 except ImportError:
     pass
 
-import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.tools import (
-    get_patient_context,
-    get_recent_events,
+    aget_patient_context,
+    aget_recent_events,
     log_symptom_event,
     log_wellness_check,
     log_workflow_result,
@@ -39,8 +40,40 @@ from agents.tools import (
     WorkflowResultInput,
     PatientContext
 )
+from agents.llm_cache import cached_messages_create
 from schemas import TriageRoute
 
+# Rendered patient profile snippet per patient_id, so every turn doesn't re-hit the store
+_patient_context_cache: TTLCache = TTLCache(maxsize=1024, ttl=300)
+
+# Full system prompt blocks per (patient_id, questions) - invariant within a conversation.
+# Keyed on the questions tuple so a changed question list renders a fresh prompt.
+_system_prompt_cache: TTLCache = TTLCache(maxsize=512, ttl=300)
+
+
+RECENT_SYMPTOM_WINDOW_HOURS = 14 * 24
+
+
+def _format_recent_symptoms(events: List[Any], limit: int = 5) -> str:
+    """Latest severity per symptom, e.g. "Headache 6/10, Nausea 3/10" (events are newest-first)."""
+    latest: Dict[str, str] = {}
+    for event in events:
+        for measurement in getattr(event, "measurements", None) or []:
+            if measurement.name in latest:
+                continue
+            severity = measurement.severity.value if measurement.severity else None
+            latest[measurement.name] = f"{measurement.name} {severity}/10" if severity is not None else measurement.name
+        if len(latest) >= limit:
+            break
+    return ", ".join(list(latest.values())[:limit])
+
+
+def invalidate_patient_prompt_cache(patient_id: str) -> None:
+    """Drop a patient's rendered context and system prompts (call after a profile change)."""
+    _patient_context_cache.pop(patient_id, None)
+    for key in [key for key in list(_system_prompt_cache.keys()) if key[0] == patient_id]:
+        _system_prompt_cache.pop(key, None)
+
 
 # ============================================================================
 # Check-in System Prompt
@@ -57,19 +90,12 @@ CHECKIN_SYSTEM_PROMPT = """You are a friendly health check-in assistant for onco
 
 **YOUR WORKFLOW:**
 1. Start by greeting the patient warmly
-2. Work through the QUESTIONS TO ASK list, one at a time
+2. Work through the questions listed in the PATIENT-SPECIFIC section below, one at a time
 3. When a patient reports symptoms, use log_symptom_event to record them
 4. When discussing mood/anxiety, use log_wellness_check to record it
 5. At the end, summarize key findings and use log_workflow_result to create an auditable record
 6. Thank the patient and end the conversation
 
-**QUESTIONS TO ASK:**
-{questions_to_ask}
-
-**PATIENT CONTEXT:**
-Patient ID: {patient_id}
-{patient_context}
-
 **IMPORTANT RULES:**
 - If the patient mentions severe symptoms (pain 8+/10, fever, difficulty breathing), acknowledge their concern and note it in your summary
 - Always log symptoms and wellness data using the tools provided
@@ -81,6 +107,80 @@ Patient ID: {patient_id}
 When you've covered all questions, create a workflow result with route "green" (routine check-in complete) unless there were concerning findings (use "yellow" then).
 """
 
+# Trimmed prompt for the fast path: style rules only, no tool workflow
+CHECKIN_FAST_SYSTEM_PROMPT = """You are a friendly health check-in assistant for oncology patients.
+
+**YOUR STYLE:**
+- Warm, conversational, and empathetic
+- Use plain language, avoid medical jargon
+- Reply in 1-2 sentences
+- Don't give medical advice
+
+The check-in is already complete. Return the patient's greeting briefly and let them know they can reach out anytime.
+"""
+
+# Everything patient-specific lives in this trailing block so the instructions
+# above stay a byte-identical (cacheable) prefix across patients and turns.
+CHECKIN_PATIENT_TEMPLATE = """--- PATIENT-SPECIFIC ---
+Patient ID: {patient_id}
+{patient_context}
+Questions:
+{questions_to_ask}
+"""
+
+
+# ============================================================================
+# Model Routing
+# ============================================================================
+
+CHECKIN_MODEL = "claude-sonnet-4-20250514"
+FAST_PATH_MODEL = "claude-3-5-haiku-20241022"
+
+# Bedrock model ids (cross-region inference profiles) for ANTHROPIC_BACKEND=bedrock
+BEDROCK_MODEL_IDS = {
+    CHECKIN_MODEL: "us.anthropic.claude-sonnet-4-20250514-v1:0",
+    FAST_PATH_MODEL: "us.anthropic.claude-3-5-haiku-20241022-v1:0",
+}
+
+# Bedrock latency-optimized inference; InvokeModel takes it as a header
+# (the Converse API equivalent is performanceConfig={"latency": "optimized"})
+BEDROCK_LATENCY_HEADERS = {"X-Amzn-Bedrock-PerformanceConfig-Latency": "optimized"}
+
+# Greetings that never need a tool call. Acknowledgements ("ok", "sure") and
+# closings ("bye") are deliberately excluded - they can answer a question or
+# end the check-in, and both need the tool-calling model.
+TRIVIAL_MESSAGES = frozenset({
+    "hi", "hello", "hey", "hi there", "hello there",
+    "good morning", "good afternoon", "good evening",
+})
+
+
+def _is_trivial_message(text: str, state: "CheckinState") -> bool:
+    """Whether a user turn can skip the full tool-calling model."""
+    # Only once nothing is left to log (see _active_tools)
+    if _active_tools(state) or len(text) >= 30:
+        return False
+    normalized = " ".join(text.lower().replace(",", " ").strip(" .!?").split())
+    return normalized in TRIVIAL_MESSAGES
+
+
+# ============================================================================
+# Rolling Summarization
+# ============================================================================
+
+# Once more than SUMMARY_TRIGGER_MESSAGES unsummarized messages build up,
+# everything but the last SUMMARY_KEEP_MESSAGES is folded into state.summary
+# and no longer sent verbatim.
+SUMMARY_TRIGGER_MESSAGES = 12
+SUMMARY_KEEP_MESSAGES = 6
+
+SUMMARY_SYSTEM_PROMPT = """Summarize this health check-in conversation for the assistant continuing it. In under 120 words, list: symptoms reported (with severity), mood/anxiety answers, which check-in questions were already asked, and anything the patient asked to follow up on. Facts only, no commentary."""
+
+
+def _summary_block(summary: str) -> Dict[str, Any]:
+    """System block carrying the rolling summary of older turns."""
+    return {"type": "text", "text": f"--- EARLIER IN THIS CHECK-IN (summary) ---\n{summary}"}
+
 
 # ============================================================================
 # Request/Response Models
@@ -95,6 +195,19 @@ class CheckinState(BaseModel):
     symptoms_logged: List[str] = Field(default_factory=list)
     wellness_logged: bool = False
     is_complete: bool = False
+    summary: str = Field(default="", description="Rolling summary of messages[:summarized_count]")
+    summarized_count: int = Field(default=0, description="Number of leading messages folded into summary")
+    
+    @field_validator("messages")
+    @classmethod
+    def _validate_messages(cls, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep messages in Claude's exact {role, content} shape so they can be sent as-is."""
+        cleaned = []
+        for msg in messages:
+            if msg.get("role") not in ("user", "assistant") or "content" not in msg:
+                raise ValueError(f"Malformed message, expected role user/assistant and content: {msg}")
+            cleaned.append(msg if len(msg) == 2 else {"role": msg["role"], "content": msg["content"]})
+        return cleaned
 
 
 class CheckinRequest(BaseModel):
@@ -108,13 +221,19 @@ class CheckinResponse(BaseModel):
     text: str = Field(..., description="Agent's response text (for TTS)")
     state: CheckinState
     tool_calls_made: List[str] = Field(default_factory=list)
+    messages_delta: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Messages added this turn, for clients that keep history locally"
+    )
 
 
 # ============================================================================
 # Tool Definitions for Claude
 # ============================================================================
 
-TOOL_DEFINITIONS = [
+# A tuple so it is never copied or mutated per call; llm_cache also keys its
+# serialized form by identity, so the schemas are JSON-encoded once per process
+TOOL_DEFINITIONS = (
     {
         "name": "log_symptom_event",
         "description": "Log a symptom reported by the patient. Call this whenever the patient mentions a physical symptom like pain, nausea, fatigue, etc.",
@@ -196,9 +315,44 @@ TOOL_DEFINITIONS = [
                 }
             },
             "required": ["route", "patient_summary"]
-        }
-    }
-]
+        },
+        # Tools are part of the cached prompt prefix; marking the last one caches all of them
+        "cache_control": {"type": "ephemeral"}
+    },
+)
+
+# Once wellness is logged the tool is dead weight in every prefill. Kept as a
+# fixed module-level variant so its cached prefix stays stable across turns.
+TOOL_DEFINITIONS_NO_WELLNESS = tuple(
+    tool for tool in TOOL_DEFINITIONS if tool["name"] != "log_wellness_check"
+)
+
+_ROUTE_MAP = {"green": TriageRoute.GREEN, "yellow": TriageRoute.YELLOW, "red": TriageRoute.RED}
+
+
+def _active_tools(state: "CheckinState") -> tuple:
+    """Tools the model can still need this turn (empty once the workflow result is logged)."""
+    if state.is_complete:
+        return ()
+    if state.wellness_logged:
+        return TOOL_DEFINITIONS_NO_WELLNESS
+    return TOOL_DEFINITIONS
+
+
+def _construct_tool_input(model_cls, data: Dict[str, Any]):
+    """
+    Build a tool input model from Claude's tool_use payload.
+    
+    Claude already shapes the payload to the tool's input_schema, so when it
+    has exactly the expected keys we skip re-validation with model_construct.
+    Anything off-schema goes through full validation (and raises a clear error).
+    """
+    fields = getattr(model_cls, "model_fields", None)
+    if fields and data.keys() <= fields.keys() and all(
+        name in data for name, field in fields.items() if field.is_required()
+    ):
+        return model_cls.model_construct(**data)
+    return model_cls(**data)
 
 
 # ============================================================================
@@ -209,74 +363,129 @@ class CheckinAgent:
     """Health check-in agent using Claude with tool calling."""
     
     def __init__(self):
-        self.client = None
-        self._init_client()
-    
-    def _init_client(self):
-        """Initialize the Anthropic client."""
+        self._client = None
+        self.use_bedrock = os.getenv("ANTHROPIC_BACKEND", "").lower() == "bedrock"
+        self.model = BEDROCK_MODEL_IDS[CHECKIN_MODEL] if self.use_bedrock else CHECKIN_MODEL
+        self.fast_model = BEDROCK_MODEL_IDS[FAST_PATH_MODEL] if self.use_bedrock else FAST_PATH_MODEL
+        self.extra_headers: Dict[str, str] = {}
+        if self.use_bedrock and os.getenv("BEDROCK_LATENCY_OPTIMIZED", "true").lower() == "true":
+            self.extra_headers = dict(BEDROCK_LATENCY_HEADERS)
+        
+        # Fail fast on missing config; the client itself is built on first use
         if not ANTHROPIC_AVAILABLE:
             raise ValueError("Anthropic package not installed. Install with: pip install anthropic")
-        
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
+        if not self.use_bedrock and not os.getenv("ANTHROPIC_API_KEY"):
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
+    
+    @property
+    def client(self):
+        """Lazy-initialize the Anthropic client."""
+        if self._client is None:
+            self._init_client()
+        return self._client
+    
+    def _init_client(self):
+        """Initialize the Anthropic client (direct API, or Bedrock via ANTHROPIC_BACKEND=bedrock)."""
+        if self.use_bedrock:
+            from anthropic import AsyncAnthropicBedrock
+            
+            # Credentials come from the standard AWS chain (env, profile, instance role)
+            self._client = AsyncAnthropicBedrock(aws_region=os.getenv("AWS_REGION", "us-east-1"))
+            return
         
-        self.client = Anthropic(api_key=api_key)
+        from anthropic import AsyncAnthropic
+        self._client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
     
-    def _build_system_prompt(self, patient_id: str, questions: List[str]) -> str:
-        """Build the system prompt with patient context and questions."""
-        # Format questions
-        questions_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+    def _system_cache_block(self, patient_block: str) -> List[Dict[str, Any]]:
+        """
+        Build the system blocks: the static instructions (cached) followed by
+        the small patient-specific tail (not cached).
+        """
+        return [
+            {
+                "type": "text",
+                "text": CHECKIN_SYSTEM_PROMPT,
+                "cache_control": {"type": "ephemeral"}
+            },
+            {
+                "type": "text",
+                "text": patient_block
+            }
+        ]
+    
+    async def _build_system_prompt(self, patient_id: str, questions: List[str]) -> List[Dict[str, Any]]:
+        """Return the system prompt blocks, rendering them once per (patient, questions)."""
+        key = (patient_id, tuple(questions))
+        system_prompt = _system_prompt_cache.get(key)
+        if system_prompt is None:
+            patient_context = await self._load_patient_context(patient_id)
+            system_prompt = self._render_system_prompt(patient_id, questions, patient_context)
+            _system_prompt_cache[key] = system_prompt
+        return system_prompt
+    
+    async def _load_patient_context(self, patient_id: str) -> str:
+        """Profile and recent-symptom snippet for the prompt (memoized per patient)."""
+        patient_context = _patient_context_cache.get(patient_id)
+        if patient_context is not None:
+            return patient_context
+        
+        # Profile and recent history are independent store reads - fetch them in parallel
+        ctx, recent = await asyncio.gather(
+            aget_patient_context(patient_id),
+            aget_recent_events(patient_id, window_hours=RECENT_SYMPTOM_WINDOW_HOURS, event_types=["symptom"]),
+            return_exceptions=True
+        )
+        if isinstance(ctx, Exception):
+            return "Patient context not available"
         
-        # Try to get patient context
         patient_context = ""
-        try:
-            ctx = get_patient_context(patient_id)
-            if ctx.profile:
-                patient_context = f"""Name: {ctx.profile.name}
+        if ctx.profile:
+            patient_context = f"""Name: {ctx.profile.name}
 Cancer Type: {ctx.profile.cancer_type or 'Not specified'}
 Current Treatment: {ctx.current_regimen or 'Not specified'}
 ECOG Score: {ctx.ecog_score if ctx.ecog_score is not None else 'Not specified'}"""
-        except Exception:
-            patient_context = "Patient context not available"
         
-        return CHECKIN_SYSTEM_PROMPT.format(
+        if not isinstance(recent, Exception):
+            recent_symptoms = _format_recent_symptoms(recent)
+            if recent_symptoms:
+                patient_context += f"\nRecent Symptoms (last 14 days): {recent_symptoms}"
+        
+        _patient_context_cache[patient_id] = patient_context
+        return patient_context
+    
+    def _render_system_prompt(self, patient_id: str, questions: List[str], patient_context: str) -> List[Dict[str, Any]]:
+        """Build the system prompt blocks with patient context and questions."""
+        # Format questions
+        questions_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+        
+        patient_block = CHECKIN_PATIENT_TEMPLATE.format(
             questions_to_ask=questions_text or "No specific questions - conduct a general wellness check.",
             patient_id=patient_id,
             patient_context=patient_context
         )
+        return self._system_cache_block(patient_block)
     
     def _execute_tool(self, tool_name: str, tool_input: Dict, patient_id: str) -> tuple[Any, str]:
         """Execute a tool and return the result."""
         try:
             if tool_name == "log_symptom_event":
-                symptom = SymptomInput(
-                    name=tool_input["name"],
-                    severity=tool_input["severity"],
-                    trend=tool_input.get("trend"),
-                    notes=tool_input.get("notes")
-                )
+                symptom = _construct_tool_input(SymptomInput, tool_input)
                 result = log_symptom_event(patient_id, symptom)
                 return result, f"Logged symptom: {tool_input['name']} (severity {tool_input['severity']}/10)"
             
             elif tool_name == "log_wellness_check":
-                wellness = WellnessInput(
-                    mood=tool_input["mood"],
-                    anxiety=tool_input["anxiety"],
-                    notes=tool_input.get("notes")
-                )
+                wellness = _construct_tool_input(WellnessInput, tool_input)
                 result = log_wellness_check(patient_id, wellness)
                 return result, f"Logged wellness: mood {tool_input['mood']}/5, anxiety {tool_input['anxiety']}/10"
             
             elif tool_name == "log_workflow_result":
-                route_map = {"green": TriageRoute.GREEN, "yellow": TriageRoute.YELLOW, "red": TriageRoute.RED}
-                workflow = WorkflowResultInput(
-                    route=route_map.get(tool_input["route"], TriageRoute.GREEN),
-                    patient_summary=tool_input["patient_summary"],
-                    clinician_summary=tool_input.get("clinician_summary"),
-                    safety_flags=tool_input.get("safety_flags", []),
-                    confidence=1.0
-                )
+                workflow = _construct_tool_input(WorkflowResultInput, {
+                    "route": _ROUTE_MAP.get(tool_input["route"], TriageRoute.GREEN),
+                    "patient_summary": tool_input["patient_summary"],
+                    "clinician_summary": tool_input.get("clinician_summary"),
+                    "safety_flags": tool_input.get("safety_flags", []),
+                    "confidence": 1.0
+                })
                 result = log_workflow_result(patient_id, workflow, workflow_name="health_checkin")
                 return result, f"Check-in complete: route={tool_input['route']}"
             
@@ -286,21 +495,43 @@ ECOG Score: {ctx.ecog_score if ctx.ecog_score is not None else 'Not specified'}"
         except Exception as e:
             return None, f"Tool error: {str(e)}"
     
-    def process_message(self, request: CheckinRequest) -> CheckinResponse:
+    async def process_message(self, request: CheckinRequest) -> CheckinResponse:
         """Process a user message and return the agent's response."""
+        tool_calls_made: List[str] = []
+        chunks = [chunk async for chunk in self.stream_message(request, tool_calls_made)]
+        
+        return CheckinResponse(
+            text="".join(chunks),
+            state=request.state,
+            tool_calls_made=tool_calls_made,
+            messages_delta=request.state.messages[-2:]
+        )
+    
+    async def stream_message(
+        self,
+        request: CheckinRequest,
+        tool_calls_made: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Process a user message, yielding response text as Claude generates it.
+        
+        request.state is updated in place once the turn finishes, and tool
+        descriptions are appended to tool_calls_made if a list is passed.
+        """
+        if tool_calls_made is None:
+            tool_calls_made = []
+        
         state = request.state
         patient_id = state.patient_id
         
         # Build messages for Claude
-        system_prompt = self._build_system_prompt(patient_id, state.questions)
+        system_prompt = await self._build_system_prompt(patient_id, state.questions)
         
-        # Convert state messages to Claude format
-        claude_messages = []
-        for msg in state.messages:
-            claude_messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
+        # Convert state messages to Claude format (older turns live in state.summary)
+        # (entries are validated to Claude's {role, content} shape, so a slice
+        # copy is enough and appends below don't touch state)
+        summarized_count = min(state.summarized_count, len(state.messages))
+        claude_messages = state.messages[summarized_count:]
         
         # Add the new user message
         claude_messages.append({
@@ -308,91 +539,173 @@ ECOG Score: {ctx.ecog_score if ctx.ecog_score is not None else 'Not specified'}"
             "content": request.text
         })
         
-        # Call Claude with tools
-        tool_calls_made = []
+        # Greetings after the workflow is complete go to the fast model without tools
+        if _is_trivial_message(request.text, state):
+            response = await self._fast_reply(state, system_prompt, claude_messages, request.text)
+            tool_calls_made.extend(response.tool_calls_made)
+            yield response.text
+            return
         
-        try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=1024,
-                system=system_prompt,
-                tools=TOOL_DEFINITIONS,
-                messages=claude_messages
+        # The summary changes as the call goes on, so it rides in its own
+        # uncached block after the cached prefix
+        turn_system = system_prompt
+        if state.summary:
+            turn_system = system_prompt + [_summary_block(state.summary)]
+        
+        # Fold older turns into the summary concurrently with this turn's call,
+        # so it's ready for the next turn without adding latency to this one
+        summary_task = None
+        summary_cut = self._summary_cut(state.messages, summarized_count)
+        if summary_cut > summarized_count:
+            summary_task = asyncio.create_task(
+                self._summarize(state.summary, state.messages[summarized_count:summary_cut])
             )
-            
-            # Process response - handle tool calls
-            final_text = ""
-            
-            while response.stop_reason == "tool_use":
-                # Extract tool calls and text from response
-                assistant_content = response.content
-                tool_results = []
+        
+        # Chosen once per turn: follow-up calls carrying tool_use blocks need
+        # the same tools even if a tool call just completed the workflow
+        active_tools = _active_tools(state)
+        
+        final_text = ""
+        
+        try:
+            while True:
+                params = dict(
+                    model=self.model,
+                    extra_headers=self.extra_headers,
+                    max_tokens=1024,
+                    system=turn_system,
+                    messages=claude_messages
+                )
+                if active_tools:
+                    params["tools"] = active_tools
+                
+                # Stream text deltas as they arrive
+                async with self.client.messages.stream(**params) as stream:
+                    async for text in stream.text_stream:
+                        final_text += text
+                        yield text
+                    response = await stream.get_final_message()
                 
-                for block in assistant_content:
-                    if block.type == "text":
-                        final_text += block.text
-                    elif block.type == "tool_use":
-                        tool_name = block.name
-                        tool_input = block.input
-                        tool_id = block.id
-                        
-                        # Execute the tool
-                        result, description = self._execute_tool(tool_name, tool_input, patient_id)
-                        tool_calls_made.append(description)
-                        
-                        # Update state based on tool
-                        if tool_name == "log_symptom_event":
-                            state.symptoms_logged.append(tool_input["name"])
-                        elif tool_name == "log_wellness_check":
-                            state.wellness_logged = True
-                        elif tool_name == "log_workflow_result":
-                            state.is_complete = True
-                        
-                        tool_results.append({
-                            "type": "tool_result",
-                            "tool_use_id": tool_id,
-                            "content": json.dumps({"success": True, "description": description})
-                        })
+                if response.stop_reason != "tool_use":
+                    break
+                
+                tool_blocks = [block for block in response.content if block.type == "tool_use"]
+                
+                # The log_* tools are independent blocking store writes, so run them
+                # concurrently off the event loop
+                results = await asyncio.gather(*[
+                    asyncio.to_thread(self._execute_tool, block.name, block.input, patient_id)
+                    for block in tool_blocks
+                ])
+                
+                tool_results = []
+                for block, (result, description) in zip(tool_blocks, results):
+                    tool_name = block.name
+                    tool_input = block.input
+                    tool_calls_made.append(description)
+                    
+                    # Update state based on tool
+                    if tool_name == "log_symptom_event":
+                        state.symptoms_logged.append(tool_input["name"])
+                    elif tool_name == "log_wellness_check":
+                        state.wellness_logged = True
+                    elif tool_name == "log_workflow_result":
+                        state.is_complete = True
+                    
+                    tool_results.append({
+                        "type": "tool_result",
+                        "tool_use_id": block.id,
+                        "content": orjson.dumps({"success": True, "description": description}).decode()
+                    })
                 
                 # Continue conversation with tool results
-                claude_messages.append({"role": "assistant", "content": assistant_content})
+                claude_messages.append({"role": "assistant", "content": response.content})
                 claude_messages.append({"role": "user", "content": tool_results})
-                
-                response = self.client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=1024,
-                    system=system_prompt,
-                    tools=TOOL_DEFINITIONS,
-                    messages=claude_messages
-                )
-            
-            # Get final text response
-            for block in response.content:
-                if block.type == "text":
-                    final_text += block.text
-            
-            # Update state with new messages
-            state.messages.append({"role": "user", "content": request.text})
-            state.messages.append({"role": "assistant", "content": final_text})
-            
-            return CheckinResponse(
-                text=final_text,
-                state=state,
-                tool_calls_made=tool_calls_made
-            )
         
         except Exception as e:
             error_msg = f"I apologize, but I'm having some technical difficulties. Let me try again. Error: {str(e)}"
-            state.messages.append({"role": "user", "content": request.text})
-            state.messages.append({"role": "assistant", "content": error_msg})
-            
-            return CheckinResponse(
-                text=error_msg,
-                state=state,
-                tool_calls_made=[]
+            final_text += error_msg
+            yield error_msg
+        
+        if summary_task is not None:
+            try:
+                state.summary = await summary_task
+                state.summarized_count = summary_cut
+            except Exception:
+                pass  # Keep sending the full history; retried next turn
+        
+        # Update state with new messages
+        state.messages.append({"role": "user", "content": request.text})
+        state.messages.append({"role": "assistant", "content": final_text})
+    
+    def _summary_cut(self, messages: List[Dict[str, Any]], summarized_count: int) -> int:
+        """
+        Index up to which messages should be summarized (summarized_count if
+        nothing is due). The kept tail always starts on a user message.
+        """
+        if len(messages) - summarized_count <= SUMMARY_TRIGGER_MESSAGES:
+            return summarized_count
+        
+        cut = len(messages) - SUMMARY_KEEP_MESSAGES
+        while cut < len(messages) and messages[cut]["role"] != "user":
+            cut += 1
+        return cut
+    
+    async def _summarize(self, previous_summary: str, messages: List[Dict[str, Any]]) -> str:
+        """Fold messages into the running summary with the fast model."""
+        transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+        content = f"Conversation:\n{transcript}"
+        if previous_summary:
+            content = f"Summary so far:\n{previous_summary}\n\n{content}"
+        
+        response = await cached_messages_create(
+            self.client,
+            model=self.fast_model,
+            extra_headers=self.extra_headers,
+            max_tokens=200,
+            temperature=0,
+            system=SUMMARY_SYSTEM_PROMPT,
+            messages=[{"role": "user", "content": content}]
+        )
+        return "".join(block.text for block in response.content if block.type == "text")
+    
+    async def _fast_reply(
+        self,
+        state: CheckinState,
+        system_prompt: List[Dict[str, Any]],
+        claude_messages: List[Dict[str, Any]],
+        text: str
+    ) -> CheckinResponse:
+        """Answer a trivial turn with Haiku, a trimmed prompt and no tools."""
+        # Keep only the patient-specific block so Haiku knows the remaining questions,
+        # plus the summary since claude_messages starts after the summarized turns
+        fast_system = [{"type": "text", "text": CHECKIN_FAST_SYSTEM_PROMPT}, system_prompt[-1]]
+        if state.summary:
+            fast_system.append(_summary_block(state.summary))
+        
+        try:
+            response = await self.client.messages.create(
+                model=self.fast_model,
+                extra_headers=self.extra_headers,
+                max_tokens=256,
+                system=fast_system,
+                messages=claude_messages
             )
+            reply = "".join(block.text for block in response.content if block.type == "text")
+        except Exception as e:
+            reply = f"I apologize, but I'm having some technical difficulties. Let me try again. Error: {str(e)}"
+        
+        state.messages.append({"role": "user", "content": text})
+        state.messages.append({"role": "assistant", "content": reply})
+        
+        return CheckinResponse(
+            text=reply,
+            state=state,
+            tool_calls_made=[f"Fast path: {self.fast_model}"],
+            messages_delta=state.messages[-2:]
+        )
     
-    def start_conversation(self, patient_id: str, questions: List[str]) -> CheckinResponse:
+    async def start_conversation(self, patient_id: str, questions: List[str]) -> CheckinResponse:
         """Start a new check-in conversation with an initial greeting."""
         state = CheckinState(
             patient_id=patient_id,
@@ -401,12 +714,13 @@ ECOG Score: {ctx.ecog_score if ctx.ecog_score is not None else 'Not specified'}"
         )
         
         # Build system prompt
-        system_prompt = self._build_system_prompt(patient_id, questions)
+        system_prompt = await self._build_system_prompt(patient_id, questions)
         
         # Get initial greeting from Claude
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
+            response = await self.client.messages.create(
+                model=self.model,
+                extra_headers=self.extra_headers,
                 max_tokens=512,
                 system=system_prompt,
                 messages=[{
@@ -425,7 +739,8 @@ ECOG Score: {ctx.ecog_score if ctx.ecog_score is not None else 'Not specified'}"
             return CheckinResponse(
                 text=greeting,
                 state=state,
-                tool_calls_made=[]
+                tool_calls_made=[],
+                messages_delta=state.messages[-1:]
             )
         
         except Exception as e:
@@ -435,9 +750,29 @@ ECOG Score: {ctx.ecog_score if ctx.ecog_score is not None else 'Not specified'}"
             return CheckinResponse(
                 text=greeting,
                 state=state,
-                tool_calls_made=[]
+                tool_calls_made=[],
+                messages_delta=state.messages[-1:]
             )
 
+    async def start_conversations_bulk(self, jobs: List[Tuple[str, List[str]]]) -> List[CheckinResponse]:
+        """
+        Start check-in conversations for many patients at once.
+        
+        Greetings are requested concurrently, so a batch of N patients completes in
+        roughly one round-trip instead of N. Failures fall back to the default
+        greeting per patient (see start_conversation).
+        
+        Args:
+            jobs: (patient_id, questions) pairs
+            
+        Returns:
+            One CheckinResponse per job, in the same order
+        """
+        return await asyncio.gather(*[
+            self.start_conversation(patient_id, questions)
+            for patient_id, questions in jobs
+        ])
+
 
 # ============================================================================
 # Module-level singleton
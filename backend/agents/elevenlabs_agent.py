@@ -12,14 +12,31 @@ This module provides:
 """
 
 import os
+import re
+import atexit
+import asyncio
+import hashlib
+from enum import IntEnum
+import threading
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field
-from elevenlabs.client import ElevenLabs
-from elevenlabs.types import ConversationalConfig
+from cachetools import TTLCache
+import orjson
 
-import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from apscheduler.schedulers.background import BackgroundScheduler
+    APSCHEDULER_AVAILABLE = True
+except ImportError:
+    APSCHEDULER_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from elevenlabs.client import ElevenLabs
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from store import store
 from schemas import EventType
@@ -29,6 +46,8 @@ from schemas import EventType
 # System Prompt Template
 # ============================================================================
 
+# All {{...}} placeholders sit in the trailing PATIENT-SPECIFIC section so the
+# instruction body is an identical prefix for every patient (prompt caching).
 SYSTEM_PROMPT_TEMPLATE = """You are a clinical voice triage intake agent for an oncology practice. Your job is to collect structured symptom data, screen for red flags, and route using deterministic protocols. The backend is the source of truth; all outputs must be auditable, replayable, and logged.
 
 You do not diagnose or provide medical advice. You do ask targeted questions, summarize accurately, and escalate conservatively.
@@ -43,7 +62,7 @@ No medication changes: Never recommend starting/stopping meds, dose changes, or
 Respect privacy & accuracy: Capture the caller's exact words in summaries/evidence. Don't guess.
 
 *TOOL USE*
-If {{patient_id}} is present, call get_patient_context({{patient_id}}) immediately; otherwise ask for patient ID/DOB and then call it.
+If a Patient ID is given in the PATIENT-SPECIFIC section below, call get_patient_context with it immediately; otherwise ask for patient ID/DOB and then call it.
 Required tool calling order (strict):
 As soon as patient_id is known: call get_patient_context(patient_id) immediately.
 If patient_id is not available yet: ask for it early (or collect minimum safety info first if urgent).
@@ -103,19 +122,67 @@ Protocol router tool failure/timeout: escalate_to_human (yellow/red based on sym
 Conflicting information / unreliable historian / language barrier: treat as unassessable → escalate.
 Call ends early: still write log_workflow_result with what you have and explicit missing fields.
 
+--- PATIENT-SPECIFIC ---
+Patient ID: {{patient_id}}
+
 *QUESTIONS TO ASK*
 {{questions_to_ask}}
 """
 
+# {{name}} placeholders in the template
+_TEMPLATE_RE = re.compile(r"\{\{([a-z_]+)\}\}")
+
+# The template pre-split once at import: literal chunks at even indices,
+# placeholders (kept as "{{name}}") at odd ones, plus where each name sits.
+# Rendering is then a list copy and a join, with no scanning.
+_TEMPLATE_PARTS: List[str] = _TEMPLATE_RE.split(SYSTEM_PROMPT_TEMPLATE)
+_PLACEHOLDER_INDEX: Dict[str, List[int]] = {}
+for _i in range(1, len(_TEMPLATE_PARTS), 2):
+    _PLACEHOLDER_INDEX.setdefault(_TEMPLATE_PARTS[_i], []).append(_i)
+    _TEMPLATE_PARTS[_i] = "{{" + _TEMPLATE_PARTS[_i] + "}}"
+
+
+def render_system_prompt(subs: Dict[str, str]) -> str:
+    """Fill SYSTEM_PROMPT_TEMPLATE placeholders; unknown ones are left as-is."""
+    parts = _TEMPLATE_PARTS[:]
+    for name, value in subs.items():
+        for idx in _PLACEHOLDER_INDEX.get(name, ()):
+            parts[idx] = value
+    return "".join(parts)
+
+
+@lru_cache(maxsize=1024)
+def _render_agent_prompt(questions: Tuple[str, ...], patient_id: str) -> Tuple[str, bytes]:
+    """Render the per-session prompt and its hash, memoized for reconnects."""
+    questions_text = "\n".join(f"{i+1}. {q}" for i, q in enumerate(questions))
+    prompt = render_system_prompt({"questions_to_ask": questions_text, "patient_id": patient_id})
+    return prompt, hashlib.blake2b(prompt.encode(), digest_size=16).digest()
+
 
 # ============================================================================
 # Response Models
 # ============================================================================
 
+class QID(IntEnum):
+    """Catalog IDs for the check-in questions compute_checkin_questions can pick."""
+    WORSENING = 0
+    POST_TREATMENT = 1
+    SAFETY_SCREEN = 2
+    EMOTIONAL = 3
+    ANXIETY_FOLLOWUP = 4
+    CATCH_ALL = 5
+    FATIGUE = 6
+    NUTRITION = 7
+    PAIN = 8
+    FUNCTIONAL = 9
+
+
 class PrecomputedQuestions(BaseModel):
     """Result of question precomputation."""
     patient_id: str
     questions: List[str]
+    question_ids: List[QID] = Field(default_factory=list, description="Catalog ID of each question")
+    question_params: Dict[str, str] = Field(default_factory=dict, description="Values filled into parameterized questions")
     reasoning: List[str] = Field(default_factory=list, description="Why each question was selected")
     context_summary: Optional[str] = None
 
@@ -138,10 +205,182 @@ class SessionStartResult(BaseModel):
     expires_at: Optional[str] = None
 
 
+# ============================================================================
+# Tool Definitions
+# ============================================================================
+
+# Shared by every webhook entry (read-only, like the definitions themselves)
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+_PATIENT_ID_PARAM = {"type": "string", "description": "The unique identifier for the patient"}
+
+# (name, description, extra parameter properties, extra required parameters).
+# Every tool also takes patient_id; each parameter is forwarded to the webhook
+# body as a "{{name}}" dynamic variable.
+_TOOL_SPECS: Tuple[Tuple[str, str, Dict[str, Any], Tuple[str, ...]], ...] = (
+    (
+        "get_patient_context",
+        "Retrieve the full patient context including profile, treatment info, and concerns. Use this at the start of a conversation.",
+        {},
+        ()
+    ),
+    (
+        "get_care_plan_protocols",
+        "Get clinical protocols and escalation criteria for a patient's complaint. This is the authority for RED/YELLOW thresholds.",
+        {"chief_complaint": {"type": "string", "description": "The symptom to get specific guidelines for"}},
+        ()
+    ),
+    (
+        "get_recent_events",
+        "Query historical events within a time window for trend detection.",
+        {"window_hours": {"type": "integer", "description": "How many hours back to look (default 168)"}},
+        ()
+    ),
+    (
+        "log_symptom_event",
+        "Log a structured symptom report to the patient's timeline.",
+        {
+            "symptom": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "severity": {"type": "integer"},
+                    "trend": {"type": "string"},
+                    "notes": {"type": "string"}
+                },
+                "required": ["name", "severity"]
+            }
+        },
+        ("symptom",)
+    ),
+    (
+        "log_wellness_check",
+        "Log mood and anxiety scores during a wellness check-in.",
+        {
+            "wellness": {
+                "type": "object",
+                "properties": {
+                    "mood": {"type": "integer"},
+                    "anxiety": {"type": "integer"},
+                    "notes": {"type": "string"}
+                },
+                "required": ["mood", "anxiety"]
+            }
+        },
+        ("wellness",)
+    ),
+    (
+        "log_workflow_result",
+        "Create the auditable artifact for the triage encounter with routing decision.",
+        {
+            "result": {
+                "type": "object",
+                "properties": {
+                    "route": {"type": "string", "enum": ["green", "yellow", "red"]},
+                    "patient_summary": {"type": "string"},
+                    "clinician_summary": {"type": "string"},
+                    "safety_flags": {"type": "array", "items": {"type": "string"}},
+                    "escalation_trigger": {"type": "string"},
+                    "confidence": {"type": "number"}
+                },
+                "required": ["route", "patient_summary"]
+            }
+        },
+        ("result",)
+    ),
+    (
+        "create_followup_task",
+        "Generate a follow-up item for the clinician's queue.",
+        {
+            "task": {
+                "type": "object",
+                "properties": {
+                    "urgency": {"type": "string", "enum": ["routine", "urgent", "stat"]},
+                    "summary": {"type": "string"},
+                    "triggered_by": {"type": "string"}
+                },
+                "required": ["urgency", "summary"]
+            }
+        },
+        ("task",)
+    ),
+    (
+        "escalate_to_human",
+        "Trigger an immediate escalation to a live human clinician.",
+        {
+            "escalation": {
+                "type": "object",
+                "properties": {
+                    "reason": {"type": "string"},
+                    "severity": {"type": "string", "enum": ["medium", "high", "critical"]},
+                    "contact_preference": {"type": "string"}
+                },
+                "required": ["reason"]
+            }
+        },
+        ("escalation",)
+    ),
+)
+
+
+def _make_tool(
+    webhook_url: str,
+    name: str,
+    description: str,
+    extra_params: Dict[str, Any],
+    extra_required: Tuple[str, ...]
+) -> Dict[str, Any]:
+    """Build one webhook tool definition from its spec (sub-dicts are shared)."""
+    properties = {"patient_id": _PATIENT_ID_PARAM, **extra_params}
+    return {
+        "type": "webhook",
+        "name": name,
+        "description": description,
+        "webhook": {
+            "url": webhook_url,
+            "method": "POST",
+            "headers": _JSON_HEADERS,
+            "body": {
+                "tool_name": name,
+                "arguments": {param: f"{{{{{param}}}}}" for param in properties}
+            }
+        },
+        "parameters": {
+            "type": "object",
+            "properties": properties,
+            "required": ["patient_id", *extra_required]
+        }
+    }
+
+
+@lru_cache(maxsize=4)
+def _build_tool_definitions(webhook_base: str) -> Tuple[Dict[str, Any], ...]:
+    """
+    Webhook tool definitions for the ElevenLabs agent, built once per
+    webhook base. The result is shared between callers - treat it as read-only.
+    """
+    webhook_url = f"{webhook_base}/agent/tools/execute"
+    return tuple(_make_tool(webhook_url, *spec) for spec in _TOOL_SPECS)
+
+
+@lru_cache(maxsize=4)
+def _tool_definitions_json(webhook_base: str) -> bytes:
+    """orjson-encoded tool definitions, serialized once per webhook base."""
+    return orjson.dumps(_build_tool_definitions(webhook_base))
+
+
 # ============================================================================
 # ElevenLabs Client Wrapper
 # ============================================================================
 
+# Signed URLs are agent-scoped and valid for ~15 minutes; reuse them until
+# shortly before they expire instead of signing one per widget open
+SIGNED_URL_TTL_SECONDS = 15 * 60
+_signed_url_cache: TTLCache = TTLCache(maxsize=10_000, ttl=SIGNED_URL_TTL_SECONDS - 60)
+
+ELEVENLABS_HTTP_TIMEOUT = 10.0
+
+
 class ElevenLabsAgentManager:
     """Manages ElevenLabs agent lifecycle and session creation."""
     
@@ -153,39 +392,63 @@ class ElevenLabsAgentManager:
         self.webhook_url = os.getenv("NGROK_WEBHOOK_URL", "")
         self._agent_id = os.getenv("ELEVENLABS_AGENT_ID")
         self._client = None
+        self._config_dirty = False
+        # Hash of the prompt last pushed to each agent; skip no-op updates
+        self._last_prompt_hash: Dict[str, bytes] = {}
         
         # Load persisted agent ID from config file
         self._load_config()
+        
+        # Setter updates are only flushed on demand; don't lose them on exit
+        atexit.register(self.flush_config)
     
     def _load_config(self):
         """Load persisted configuration from file."""
-        import json
-        if os.path.exists(self.CONFIG_FILE):
-            try:
-                with open(self.CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    if not self._agent_id and config.get('agent_id'):
-                        self._agent_id = config['agent_id']
-            except Exception:
-                pass
+        try:
+            with open(self.CONFIG_FILE, 'rb') as f:
+                config = orjson.loads(f.read())
+        except FileNotFoundError:
+            return
+        except Exception:
+            # Unreadable or corrupt config: fall back to the environment
+            return
+        if not self._agent_id and config.get('agent_id'):
+            self._agent_id = config['agent_id']
     
     def _save_config(self):
-        """Persist configuration to file."""
-        import json
+        """Persist configuration to file (atomically, via a temp file + rename)."""
         config = {'agent_id': self._agent_id}
+        tmp_path = self.CONFIG_FILE + ".tmp"
         try:
-            with open(self.CONFIG_FILE, 'w') as f:
-                json.dump(config, f)
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(config))
+            os.replace(tmp_path, self.CONFIG_FILE)
+            self._config_dirty = False
         except Exception:
             pass
     
+    def flush_config(self):
+        """Write pending config changes, if any (coalesces repeated agent_id updates)."""
+        if self._config_dirty:
+            self._save_config()
+    
     @property
-    def client(self) -> ElevenLabs:
-        """Lazy-initialize the ElevenLabs client."""
+    def client(self) -> "ElevenLabs":
+        """Lazy-initialize the ElevenLabs client (the SDK is imported on first use)."""
         if self._client is None:
             if not self.api_key:
                 raise ValueError("ELEVENLABS_API_KEY environment variable not set")
-            self._client = ElevenLabs(api_key=self.api_key)
+            import httpx
+            from elevenlabs.client import ElevenLabs
+            # Explicit keep-alive pool (HTTP/2 where available) so bursts of
+            # prompt updates and signed-URL requests reuse TLS connections
+            http_client = httpx.Client(
+                http2=True,
+                timeout=ELEVENLABS_HTTP_TIMEOUT,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+            atexit.register(http_client.close)
+            self._client = ElevenLabs(api_key=self.api_key, httpx_client=http_client)
         return self._client
     
     @property
@@ -195,238 +458,20 @@ class ElevenLabsAgentManager:
     
     @agent_id.setter
     def agent_id(self, value: str):
-        """Set the agent ID and persist it."""
+        """Set the agent ID; persisted on the next flush_config()."""
         self._agent_id = value
-        self._save_config()
+        self._config_dirty = True
     
     def get_tool_definitions(self) -> List[Dict[str, Any]]:
         """
         Generate tool definitions for the ElevenLabs agent.
         These map to our existing webhook at /agent/tools/execute
         """
-        webhook_base = self.webhook_url.rstrip("/")
-        
-        return [
-            {
-                "type": "webhook",
-                "name": "get_patient_context",
-                "description": "Retrieve the full patient context including profile, treatment info, and concerns. Use this at the start of a conversation.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "get_patient_context",
-                        "arguments": {"patient_id": "{{patient_id}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"}
-                    },
-                    "required": ["patient_id"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "get_care_plan_protocols",
-                "description": "Get clinical protocols and escalation criteria for a patient's complaint. This is the authority for RED/YELLOW thresholds.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "get_care_plan_protocols",
-                        "arguments": {"patient_id": "{{patient_id}}", "chief_complaint": "{{chief_complaint}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "chief_complaint": {"type": "string", "description": "The symptom to get specific guidelines for"}
-                    },
-                    "required": ["patient_id"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "get_recent_events",
-                "description": "Query historical events within a time window for trend detection.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "get_recent_events",
-                        "arguments": {"patient_id": "{{patient_id}}", "window_hours": "{{window_hours}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "window_hours": {"type": "integer", "description": "How many hours back to look (default 168)"}
-                    },
-                    "required": ["patient_id"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "log_symptom_event",
-                "description": "Log a structured symptom report to the patient's timeline.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "log_symptom_event",
-                        "arguments": {"patient_id": "{{patient_id}}", "symptom": "{{symptom}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "symptom": {
-                            "type": "object",
-                            "properties": {
-                                "name": {"type": "string"},
-                                "severity": {"type": "integer"},
-                                "trend": {"type": "string"},
-                                "notes": {"type": "string"}
-                            },
-                            "required": ["name", "severity"]
-                        }
-                    },
-                    "required": ["patient_id", "symptom"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "log_wellness_check",
-                "description": "Log mood and anxiety scores during a wellness check-in.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "log_wellness_check",
-                        "arguments": {"patient_id": "{{patient_id}}", "wellness": "{{wellness}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "wellness": {
-                            "type": "object",
-                            "properties": {
-                                "mood": {"type": "integer"},
-                                "anxiety": {"type": "integer"},
-                                "notes": {"type": "string"}
-                            },
-                            "required": ["mood", "anxiety"]
-                        }
-                    },
-                    "required": ["patient_id", "wellness"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "log_workflow_result",
-                "description": "Create the auditable artifact for the triage encounter with routing decision.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "log_workflow_result",
-                        "arguments": {"patient_id": "{{patient_id}}", "result": "{{result}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "result": {
-                            "type": "object",
-                            "properties": {
-                                "route": {"type": "string", "enum": ["green", "yellow", "red"]},
-                                "patient_summary": {"type": "string"},
-                                "clinician_summary": {"type": "string"},
-                                "safety_flags": {"type": "array", "items": {"type": "string"}},
-                                "escalation_trigger": {"type": "string"},
-                                "confidence": {"type": "number"}
-                            },
-                            "required": ["route", "patient_summary"]
-                        }
-                    },
-                    "required": ["patient_id", "result"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "create_followup_task",
-                "description": "Generate a follow-up item for the clinician's queue.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "create_followup_task",
-                        "arguments": {"patient_id": "{{patient_id}}", "task": "{{task}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "task": {
-                            "type": "object",
-                            "properties": {
-                                "urgency": {"type": "string", "enum": ["routine", "urgent", "stat"]},
-                                "summary": {"type": "string"},
-                                "triggered_by": {"type": "string"}
-                            },
-                            "required": ["urgency", "summary"]
-                        }
-                    },
-                    "required": ["patient_id", "task"]
-                }
-            },
-            {
-                "type": "webhook",
-                "name": "escalate_to_human",
-                "description": "Trigger an immediate escalation to a live human clinician.",
-                "webhook": {
-                    "url": f"{webhook_base}/agent/tools/execute",
-                    "method": "POST",
-                    "headers": {"Content-Type": "application/json"},
-                    "body": {
-                        "tool_name": "escalate_to_human",
-                        "arguments": {"patient_id": "{{patient_id}}", "escalation": "{{escalation}}"}
-                    }
-                },
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "patient_id": {"type": "string", "description": "The unique identifier for the patient"},
-                        "escalation": {
-                            "type": "object",
-                            "properties": {
-                                "reason": {"type": "string"},
-                                "severity": {"type": "string", "enum": ["medium", "high", "critical"]},
-                                "contact_preference": {"type": "string"}
-                            },
-                            "required": ["reason"]
-                        }
-                    },
-                    "required": ["patient_id", "escalation"]
-                }
-            }
-        ]
+        return list(_build_tool_definitions(self.webhook_url.rstrip("/")))
+    
+    def get_tool_definitions_json(self) -> bytes:
+        """Tool definitions pre-serialized with orjson, for raw HTTP requests."""
+        return _tool_definitions_json(self.webhook_url.rstrip("/"))
     
     def create_agent(self, name: str = "Oncology Triage Agent") -> AgentConfig:
         """
@@ -440,14 +485,14 @@ class ElevenLabsAgentManager:
         """
         # Render the prompt template with a placeholder for questions
         # (will be overridden per-session)
-        initial_prompt = SYSTEM_PROMPT_TEMPLATE.replace(
-            "{{questions_to_ask}}", 
-            "1. How have you been feeling overall since your last check-in?\n"
-            "2. Have you experienced any new or worsening symptoms?\n"
-            "3. Any fever, chills, or signs of infection?\n"
-            "4. How is your pain level today?\n"
-            "5. Is there anything else on your mind you'd like to discuss?"
-        )
+        initial_prompt = render_system_prompt({
+            "questions_to_ask":
+                "1. How have you been feeling overall since your last check-in?\n"
+                "2. Have you experienced any new or worsening symptoms?\n"
+                "3. Any fever, chills, or signs of infection?\n"
+                "4. How is your pain level today?\n"
+                "5. Is there anything else on your mind you'd like to discuss?"
+        })
         
         # Create the agent via ElevenLabs API
         agent = self.client.conversational_ai.agents.create(
@@ -475,8 +520,9 @@ class ElevenLabsAgentManager:
         )
         
         # Store and persist the agent ID
-        self._agent_id = agent.agent_id
-        self._save_config()
+        self.agent_id = agent.agent_id
+        self._last_prompt_hash.pop(agent.agent_id, None)
+        self.flush_config()
         
         return AgentConfig(
             agent_id=agent.agent_id,
@@ -528,12 +574,12 @@ class ElevenLabsAgentManager:
         if not self._agent_id:
             raise ValueError("No agent configured. Call create_agent() first.")
         
-        # Format questions for injection
-        questions_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(questions)])
+        # Format questions and render the prompt (memoized per question set)
+        updated_prompt, prompt_hash = _render_agent_prompt(tuple(questions), patient_id)
         
-        # Create the updated prompt
-        updated_prompt = SYSTEM_PROMPT_TEMPLATE.replace("{{questions_to_ask}}", questions_text)
-        updated_prompt = updated_prompt.replace("{{patient_id}}", patient_id)
+        # Reconnects usually re-send the same questions; skip the round-trip
+        if self._last_prompt_hash.get(self._agent_id) == prompt_hash:
+            return
         
         # Update the agent's prompt
         self.client.conversational_ai.agents.update(
@@ -551,6 +597,7 @@ class ElevenLabsAgentManager:
                 }
             }
         )
+        self._last_prompt_hash[self._agent_id] = prompt_hash
     
     def get_signed_url(
         self, 
@@ -580,24 +627,104 @@ class ElevenLabsAgentManager:
         pid = patient_id_override or patient_id
         self.update_agent_prompt(questions, pid)
         
-        # Get signed URL
-        signed_url_response = self.client.conversational_ai.conversations.get_signed_url(
-            agent_id=self._agent_id
+        signed_url, expires_at = self._fetch_signed_url(patient_id)
+        return SessionStartResult(
+            signed_url=signed_url,
+            agent_id=self._agent_id,
+            patient_id=patient_id,
+            questions=questions,
+            expires_at=expires_at
         )
+    
+    async def aget_signed_url(
+        self,
+        patient_id: str,
+        questions: List[str],
+        patient_id_override: Optional[str] = None
+    ) -> SessionStartResult:
+        """
+        Async variant of get_signed_url.
+        
+        The prompt update and the signed-URL request hit different ElevenLabs
+        endpoints, so they run concurrently (the SDK is sync, hence to_thread).
+        The signed URL only grants widget access; the session reads the agent
+        config when the conversation starts, after both calls have returned.
+        """
+        if not self._agent_id:
+            raise ValueError("No agent configured. Call create_agent() first.")
         
+        pid = patient_id_override or patient_id
+        _, (signed_url, expires_at) = await asyncio.gather(
+            asyncio.to_thread(self.update_agent_prompt, questions, pid),
+            asyncio.to_thread(self._fetch_signed_url, patient_id)
+        )
         return SessionStartResult(
-            signed_url=signed_url_response.signed_url,
+            signed_url=signed_url,
             agent_id=self._agent_id,
             patient_id=patient_id,
             questions=questions,
-            expires_at=None  # ElevenLabs doesn't expose this in the response
+            expires_at=expires_at
         )
+    
+    def _fetch_signed_url(self, patient_id: str) -> Tuple[str, str]:
+        """Get a (signed_url, expires_at) pair, cached until shortly before expiry."""
+        key = (self._agent_id, patient_id)
+        cached = _signed_url_cache.get(key)
+        if cached is None:
+            signed_url_response = self.client.conversational_ai.conversations.get_signed_url(
+                agent_id=self._agent_id
+            )
+            # ElevenLabs doesn't expose expiry in the response; track it from issue time
+            expires_at = (datetime.utcnow() + timedelta(seconds=SIGNED_URL_TTL_SECONDS)).isoformat() + "Z"
+            cached = (signed_url_response.signed_url, expires_at)
+            _signed_url_cache[key] = cached
+        return cached
 
 
 # ============================================================================
 # Question Precomputation Logic
 # ============================================================================
 
+# Precomputed questions per (patient_id, window_hours), stored with the store's
+# patient version so any new event or profile edit forces a recompute
+PRECOMPUTED_QUESTIONS_TTL_SECONDS = 24 * 60 * 60
+_precomputed_questions_cache: TTLCache = TTLCache(maxsize=10_000, ttl=PRECOMPUTED_QUESTIONS_TTL_SECONDS)
+
+MAX_CHECKIN_QUESTIONS = 5
+
+# Question text per catalog ID; {name} fields come from question_params
+QUESTION_CATALOG: Dict[QID, str] = {
+    QID.WORSENING: "I noticed you recently reported {symptom_list}. How is that today - better, worse, or about the same?",
+    QID.POST_TREATMENT: "You had {treatment_name} recently. Any new side effects since then - nausea, fatigue, mouth sores, or anything unusual?",
+    QID.SAFETY_SCREEN: "Any fever, chills, or feeling like you might have an infection?",
+    QID.EMOTIONAL: "How have you been feeling emotionally? Any increased anxiety or low mood?",
+    QID.ANXIETY_FOLLOWUP: "Last time we checked in, your anxiety was elevated. How are you feeling now?",
+    QID.CATCH_ALL: "Is there anything else on your mind today - any symptoms, concerns, or questions?",
+    QID.FATIGUE: "How's your energy level been? Any unusual fatigue?",
+    QID.NUTRITION: "Are you able to eat and drink normally?",
+    QID.PAIN: "Any pain that's new or different from before?",
+    QID.FUNCTIONAL: "Have you been able to keep up with your daily activities?",
+}
+
+# (question, reasoning) fillers used when the event scans come up short
+GENERIC_CHECKIN_QUESTIONS = (
+    (QID.FATIGUE, "General fatigue screening for oncology patients"),
+    (QID.NUTRITION, "Nutrition and hydration assessment"),
+    (QID.PAIN, "Pain assessment"),
+    (QID.FUNCTIONAL, "Functional status / ECOG assessment"),
+)
+
+
+def render_questions(question_ids: List[QID], params: Dict[str, str]) -> List[str]:
+    """Expand catalog IDs into question text."""
+    return [QUESTION_CATALOG[qid].format_map(params) for qid in question_ids]
+
+
+def _parse_ts(timestamp: str) -> datetime:
+    """Parse an internally generated ISO-8601 timestamp as a naive UTC datetime."""
+    return datetime.fromisoformat(timestamp.rstrip('Z')).replace(tzinfo=None)
+
+
 def compute_checkin_questions(patient_id: str, window_hours: int = 84) -> PrecomputedQuestions:
     """
     Analyze recent patient events and generate 5 targeted check-in questions.
@@ -615,34 +742,39 @@ def compute_checkin_questions(patient_id: str, window_hours: int = 84) -> Precom
     Returns:
         PrecomputedQuestions with 5 prioritized questions and reasoning
     """
-    questions = []
+    question_ids: List[QID] = []
+    params: Dict[str, str] = {}
     reasoning = []
     
-    # Get recent events
-    recent_events = store.get_recent_events(patient_id, window_hours=window_hours)
+    # Get patient profile (for context) and recent events in one store call
+    profile, recent_events = store.get_checkin_bundle(patient_id, window_hours=window_hours)
     
-    # Get patient profile for context
-    profile = store.get_profile(patient_id)
+    # Separate by type (single pass). get_recent_events returns newest first and
+    # the buckets keep that order, so the scans below stop at the latest match.
+    by_type: Dict[EventType, List[Any]] = {EventType.SYMPTOM: [], EventType.TREATMENT: [], EventType.WELLNESS: []}
+    for event in recent_events:
+        bucket = by_type.get(event.event_type)
+        if bucket is not None:
+            bucket.append(event)
+    symptom_events = by_type[EventType.SYMPTOM]
+    treatment_events = by_type[EventType.TREATMENT]
+    wellness_events = by_type[EventType.WELLNESS]
     
-    # Separate by type
-    symptom_events = [e for e in recent_events if e.event_type == EventType.SYMPTOM]
-    treatment_events = [e for e in recent_events if e.event_type == EventType.TREATMENT]
-    wellness_events = [e for e in recent_events if e.event_type == EventType.WELLNESS]
-    
-    # 1. Check for worsening symptoms
-    worsening_symptoms = []
+    # 1. Check for worsening symptoms (ordered, deduplicated on insert)
+    worsening_symptoms: Dict[str, None] = {}
     for event in symptom_events:
-        if hasattr(event, 'measurements') and event.measurements:
-            for m in event.measurements:
-                if hasattr(m, 'trend') and m.trend == "worsening":
-                    worsening_symptoms.append(m.name if hasattr(m, 'name') else "symptom")
-                elif hasattr(m, 'severity') and m.severity and hasattr(m.severity, 'value'):
-                    if m.severity.value and m.severity.value >= 6:
-                        worsening_symptoms.append(m.name if hasattr(m, 'name') else "symptom")
+        for m in getattr(event, 'measurements', None) or ():
+            if getattr(m, 'trend', None) == "worsening":
+                worsening_symptoms[getattr(m, 'name', "symptom")] = None
+            else:
+                severity_value = getattr(getattr(m, 'severity', None), 'value', None)
+                if severity_value and severity_value >= 6:
+                    worsening_symptoms[getattr(m, 'name', "symptom")] = None
     
     if worsening_symptoms:
-        symptom_list = ", ".join(set(worsening_symptoms[:2]))
-        questions.append(f"I noticed you recently reported {symptom_list}. How is that today - better, worse, or about the same?")
+        symptom_list = ", ".join(list(worsening_symptoms)[:2])
+        params["symptom_list"] = symptom_list
+        question_ids.append(QID.WORSENING)
         reasoning.append(f"Recent symptom(s) marked as worsening or high severity: {symptom_list}")
     
     # 2. Check for post-treatment risk window (infusion < 7 days ago)
@@ -650,58 +782,53 @@ def compute_checkin_questions(patient_id: str, window_hours: int = 84) -> Precom
     recent_treatment = None
     for event in treatment_events:
         try:
-            from dateutil import parser as dateparser
-            event_time = dateparser.parse(event.timestamp)
-            if event_time.tzinfo:
-                event_time = event_time.replace(tzinfo=None)
-            days_ago = (now - event_time).days
-            if days_ago <= 7:
-                recent_treatment = event
-                break
-        except:
+            event_time = _parse_ts(event.timestamp)
+        except (TypeError, ValueError):
             continue
+        # Newest first: if this one is outside the window, every later one is too
+        if (now - event_time).days <= 7:
+            recent_treatment = event
+        break
     
     if recent_treatment:
-        treatment_name = recent_treatment.name if hasattr(recent_treatment, 'name') else "your treatment"
-        questions.append(f"You had {treatment_name} recently. Any new side effects since then - nausea, fatigue, mouth sores, or anything unusual?")
+        treatment_name = getattr(recent_treatment, 'name', "your treatment")
+        params["treatment_name"] = treatment_name
+        question_ids.append(QID.POST_TREATMENT)
         reasoning.append(f"Post-treatment risk window: {treatment_name} within last 7 days")
     
     # 3. Always ask about red-flag symptoms (mandatory safety screen)
-    if len(questions) < 3:
-        questions.append("Any fever, chills, or feeling like you might have an infection?")
+    if len(question_ids) < 3:
+        question_ids.append(QID.SAFETY_SCREEN)
         reasoning.append("Mandatory safety screen: febrile neutropenia risk in oncology patients")
     
     # 4. Check mood/anxiety if no recent wellness data
     if not wellness_events:
-        questions.append("How have you been feeling emotionally? Any increased anxiety or low mood?")
+        question_ids.append(QID.EMOTIONAL)
         reasoning.append("No wellness check-in logged in recent window - assessing QoL")
     else:
         # Check if anxiety was high
         for event in wellness_events:
-            if hasattr(event, 'anxiety') and event.anxiety and event.anxiety >= 6:
-                questions.append("Last time we checked in, your anxiety was elevated. How are you feeling now?")
-                reasoning.append(f"Previous wellness check showed anxiety level {event.anxiety}/10")
+            anxiety = getattr(event, 'anxiety', None)
+            if anxiety and anxiety >= 6:
+                question_ids.append(QID.ANXIETY_FOLLOWUP)
+                reasoning.append(f"Previous wellness check showed anxiety level {anxiety}/10")
                 break
     
-    # 5. Open-ended catch-all (always include)
-    questions.append("Is there anything else on your mind today - any symptoms, concerns, or questions?")
-    reasoning.append("Open-ended prompt to catch unreported issues")
-    
-    # If we don't have enough questions, add generic ones
-    generic_questions = [
-        ("How's your energy level been? Any unusual fatigue?", "General fatigue screening for oncology patients"),
-        ("Are you able to eat and drink normally?", "Nutrition and hydration assessment"),
-        ("Any pain that's new or different from before?", "Pain assessment"),
-        ("Have you been able to keep up with your daily activities?", "Functional status / ECOG assessment"),
-    ]
-    
-    for q, r in generic_questions:
-        if len(questions) >= 5:
+    # If we don't have enough questions, add generic ones (leaving the last
+    # slot for the catch-all)
+    seen = set(question_ids)
+    for qid, r in GENERIC_CHECKIN_QUESTIONS:
+        if len(question_ids) >= MAX_CHECKIN_QUESTIONS - 1:
             break
-        if q not in questions:
-            questions.append(q)
+        if qid not in seen:
+            seen.add(qid)
+            question_ids.append(qid)
             reasoning.append(r)
     
+    # 5. Open-ended catch-all (always included, always last)
+    question_ids.append(QID.CATCH_ALL)
+    reasoning.append("Open-ended prompt to catch unreported issues")
+    
     # Build context summary
     context_parts = []
     if profile:
@@ -713,15 +840,71 @@ def compute_checkin_questions(patient_id: str, window_hours: int = 84) -> Precom
     
     return PrecomputedQuestions(
         patient_id=patient_id,
-        questions=questions[:5],
-        reasoning=reasoning[:5],
+        questions=render_questions(question_ids, params),
+        question_ids=question_ids,
+        question_params=params,
+        reasoning=reasoning,
         context_summary=" | ".join(context_parts) if context_parts else None
     )
 
 
+def get_precomputed_questions(patient_id: str, window_hours: int = 84) -> PrecomputedQuestions:
+    """
+    Cached compute_checkin_questions.
+    
+    Reuses the last result until the patient's profile/events change or
+    24 hours pass (post-treatment windows are time-dependent).
+    """
+    version = store.get_patient_version(patient_id)
+    key = (patient_id, window_hours)
+    cached = _precomputed_questions_cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    
+    result = compute_checkin_questions(patient_id, window_hours=window_hours)
+    _precomputed_questions_cache[key] = (version, result)
+    return result
+
+
+def warm_precomputed_questions(window_hours: int = 84) -> int:
+    """Precompute check-in questions for every patient. Returns the number warmed."""
+    profiles = store.list_profiles()
+    for profile in profiles:
+        _precomputed_questions_cache.pop((profile.id, window_hours), None)
+        get_precomputed_questions(profile.id, window_hours=window_hours)
+    return len(profiles)
+
+
+def start_precompute_scheduler(hour: int = 2):
+    """
+    Schedule warm_precomputed_questions nightly (requires apscheduler).
+    
+    Returns the running scheduler, or None if apscheduler isn't installed.
+    """
+    if not APSCHEDULER_AVAILABLE:
+        return None
+    
+    scheduler = BackgroundScheduler(daemon=True)
+    scheduler.add_job(warm_precomputed_questions, "cron", hour=hour, id="warm_precomputed_questions", replace_existing=True)
+    scheduler.start()
+    return scheduler
+
+
 # ============================================================================
 # Module-level singleton
 # ============================================================================
 
-agent_manager = ElevenLabsAgentManager()
+# Built on first use so importing this module doesn't read the config file
+_agent_manager: Optional[ElevenLabsAgentManager] = None
+_agent_manager_lock = threading.Lock()
+
+
+def get_agent_manager() -> ElevenLabsAgentManager:
+    """Get the singleton ElevenLabs agent manager."""
+    global _agent_manager
+    if _agent_manager is None:
+        with _agent_manager_lock:
+            if _agent_manager is None:
+                _agent_manager = ElevenLabsAgentManager()
+    return _agent_manager
 
@@ -0,0 +1,147 @@
+"""
+LLM Response Cache
+------------------
+Persistent cache for Anthropic `messages.create` responses.
+
+Identical requests (same model, system, tools, messages, max_tokens) replay the
+stored response instead of paying for another API round-trip. Only calls made
+through cached_messages_create with temperature=0 are eligible; in the
+check-in agent that is the rolling summarization, which mostly hits on
+repeated dev/eval runs.
+
+The cache is off unless LLM_CACHE_ENABLED=true, and entries expire after
+LLM_CACHE_TTL_SECONDS (default one day): conversations include patient
+context, so they shouldn't sit on disk indefinitely.
+
+Only deterministic requests are cached:
+- temperature must be explicitly 0
+- the conversation must not contain tool_result blocks (those depend on
+  side effects in the store, so replaying them would be wrong)
+"""
+
+import os
+import json
+import hashlib
+from typing import Any, Dict, Tuple
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+    diskcache = None
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
+
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "false").lower() == "true"
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_DIR = os.getenv(
+    "LLM_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm")
+)
+
+# Request fields that determine the response (tools are hashed separately)
+_KEY_FIELDS = ("model", "system", "messages", "max_tokens")
+
+# Serialized tool lists keyed by identity. Only tuples are memoized: the
+# module-level tool definitions are immutable and passed on every call.
+_tools_json: Dict[int, Tuple[Any, bytes]] = {}
+
+_cache = None
+
+
+def _get_cache():
+    """Lazy-open the on-disk cache (None if disabled or diskcache is not installed)."""
+    global _cache
+    if _cache is None and LLM_CACHE_ENABLED and DISKCACHE_AVAILABLE:
+        _cache = diskcache.Cache(LLM_CACHE_DIR)
+    return _cache
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize SDK content blocks that may appear in messages."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return str(obj)
+
+
+def _is_cacheable(params: Dict[str, Any]) -> bool:
+    """Only cache deterministic, side-effect-free requests."""
+    if params.get("temperature", 1.0) > 0:
+        return False
+
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if not isinstance(content, list):
+            continue
+        for block in content:
+            block_type = block.get("type") if isinstance(block, dict) else getattr(block, "type", None)
+            if block_type == "tool_result":
+                return False
+
+    return True
+
+
+def _serialize_tools(tools: Any) -> bytes:
+    """JSON-encode tool definitions, once per process for immutable tuples."""
+    if not isinstance(tools, tuple):
+        return json.dumps(tools, sort_keys=True, default=_json_default).encode()
+
+    entry = _tools_json.get(id(tools))
+    if entry is None or entry[0] is not tools:
+        entry = (tools, json.dumps(tools, sort_keys=True, default=_json_default).encode())
+        _tools_json[id(tools)] = entry
+    return entry[1]
+
+
+def cache_key(params: Dict[str, Any]) -> str:
+    """Stable hash of the request fields that determine the response."""
+    payload = json.dumps(
+        {field: params.get(field) for field in _KEY_FIELDS},
+        sort_keys=True,
+        default=_json_default
+    ).encode() + b"\x00" + _serialize_tools(params.get("tools"))
+
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh128(payload).hexdigest()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def get_cached_response(params: Dict[str, Any]):
+    """Return the cached Message for this request, or None on a miss."""
+    cache = _get_cache()
+    if cache is None or not _is_cacheable(params):
+        return None
+
+    data = cache.get(cache_key(params))
+    if data is None:
+        return None
+
+    from anthropic.types import Message
+    return Message.model_validate(data)
+
+
+def cache_response(params: Dict[str, Any], response) -> None:
+    """Persist a response for replay (no-op for non-cacheable requests)."""
+    cache = _get_cache()
+    if cache is None or not _is_cacheable(params):
+        return
+
+    cache.set(cache_key(params), response.model_dump(), expire=LLM_CACHE_TTL_SECONDS)
+
+
+async def cached_messages_create(client, **params):
+    """Drop-in replacement for `await client.messages.create(**params)` with replay."""
+    cached = get_cached_response(params)
+    if cached is not None:
+        return cached
+
+    response = await client.messages.create(**params)
+    cache_response(params, response)
+    return response
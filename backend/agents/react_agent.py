@@ -11,18 +11,21 @@ The agent follows the ReAct pattern:
 """
 
 import os
-import json
 import re
-from typing import Dict, List, Optional, Any
-from pydantic import BaseModel, Field
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Any, Tuple
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
+from cachetools import TTLCache
+import orjson
 
 try:
-    from anthropic import Anthropic
+    from anthropic import AsyncAnthropic
     ANTHROPIC_AVAILABLE = True
 except ImportError:
     ANTHROPIC_AVAILABLE = False
-    Anthropic = None
+    AsyncAnthropic = None
 
 # Load environment variables
 try:
@@ -31,17 +34,20 @@ try:
 except ImportError:
     pass
 
-import sys
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.tools import (
     web_search,
+    aweb_search,
     get_patient_context,
     get_care_plan_protocols,
     get_recent_events,
-    log_symptom_event,
-    log_wellness_check,
-    log_workflow_result,
+    build_symptom_event,
+    build_wellness_event,
+    build_workflow_result_event,
+    queue_event,
     create_followup_task,
     escalate_to_human,
     SymptomInput,
@@ -49,10 +55,33 @@ from agents.tools import (
     WorkflowResultInput,
     FollowupTaskInput,
     EscalationInput,
-    PatientContext
+    PatientContext,
+    TOOL_INPUT_ADAPTERS
 )
 from schemas import TriageRoute, TaskUrgency
 
+logger = logging.getLogger(__name__)
+
+# Formatted patient context for the system prompt, reused across turns
+_patient_context_text_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+# System blocks per (patient_id, conversation_id), built once at conversation
+# start so every turn sends a byte-identical (prompt-cacheable) prefix. Kept
+# server-side rather than on ChatState so clients can't rewrite the prompt.
+_system_prompt_cache: TTLCache = TTLCache(maxsize=1024, ttl=2 * 60 * 60)
+
+# Read-only tool results per conversation_id: {(tool_name, args_json): (result, result_str)}.
+# Claude often repeats context/protocol lookups within a conversation.
+_READ_ONLY_TOOLS = frozenset({"web_search", "get_patient_context", "get_care_plan_protocols", "get_recent_events"})
+_tool_result_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def invalidate_chat_prompt_cache(patient_id: str) -> None:
+    """Drop a patient's cached context text and system prompts (call after a profile change)."""
+    _patient_context_text_cache.pop(patient_id, None)
+    for key in [key for key in list(_system_prompt_cache.keys()) if key[0] == patient_id]:
+        _system_prompt_cache.pop(key, None)
+
 
 # ============================================================================
 # State and Response Models
@@ -71,6 +100,18 @@ class ChatState(BaseModel):
     patient_id: str
     messages: List[Dict[str, str]] = Field(default_factory=list)
     conversation_id: str = ""
+    stage: str = Field(default="intake", description="'intake' until a symptom is logged or protocols are checked, then 'triage'")
+    
+    @field_validator("messages")
+    @classmethod
+    def _validate_messages(cls, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Keep messages in Claude's exact {role, content} shape so they can be sent as-is."""
+        cleaned = []
+        for msg in messages:
+            if msg.get("role") not in ("user", "assistant") or "content" not in msg:
+                raise ValueError(f"Malformed message, expected role user/assistant and content: {msg}")
+            cleaned.append(msg if len(msg) == 2 else {"role": msg["role"], "content": msg["content"]})
+        return cleaned
 
 
 class ChatRequest(BaseModel):
@@ -87,6 +128,37 @@ class ChatResponse(BaseModel):
     tool_calls: List[Dict[str, Any]] = Field(default_factory=list)
 
 
+REACT_MODEL = "claude-sonnet-4-20250514"
+# Turns start on the fast model; once Claude reaches for one of these tools
+# (a clinical judgement call) the rest of the turn runs on REACT_MODEL
+REACT_FAST_MODEL = "claude-3-5-haiku-20241022"
+_DEEP_REASONING_TOOLS = frozenset({"get_care_plan_protocols", "escalate_to_human", "log_workflow_result"})
+
+# Output ceilings. Any ReAct call may turn out to be the patient-facing answer
+# (tool use isn't known up front), so it gets room for a full reply; the
+# prompt asks for one question at a time, so that is well under 1024.
+REACT_MAX_TOKENS = 1024
+GREETING_MAX_TOKENS = 256
+
+# Canned replies that skip an API call: the opening greeting, and the
+# reply sent once escalate_to_human has alerted the care team
+GREETING_TEMPLATE = (
+    "Hi {name}, I'm your health assistant. I can help with symptoms, side effects, "
+    "or questions about your care. How are you feeling today?"
+)
+DEFAULT_GREETING = "Hello! I'm your health assistant. How can I help you today?"
+ESCALATION_REPLY = (
+    "I've alerted your care team about: {reason}. A clinician will reach out to you shortly. "
+    "If this is life-threatening, please call 911 or go to the nearest emergency room now."
+)
+
+# Context budgets: tool results go back to Claude on every later iteration, and
+# history on every turn, so both are capped (tokens estimated as chars / 4)
+TOOL_RESULT_MAX_TOKENS = 1200
+MAX_RECENT_EVENTS = 25
+MAX_HISTORY_MESSAGES = 40
+
+
 # ============================================================================
 # System Prompt
 # ============================================================================
@@ -331,11 +403,209 @@ TOOL_DEFINITIONS = [
                 }
             },
             "required": ["reason"]
-        }
+        },
+        # Tools are part of the cached prompt prefix; marking the last one caches all of them
+        "cache_control": {"type": "ephemeral"}
     }
 ]
 
 
+def _dump_json_list(models: List[BaseModel]) -> str:
+    """
+    Compact JSON array of models for tool results. Dumped one by one so event
+    subclasses keep their own fields (a List[BaseEvent] adapter would drop them).
+    """
+    return "[" + ",".join(m.model_dump_json() for m in models) + "]"
+
+
+# Tools offered per conversation stage. escalate_to_human is in every stage
+# (red flags can come up at any point) and stays last, so its cache_control
+# marker caches whichever subset is sent.
+_TOOLS_BY_NAME = {tool["name"]: tool for tool in TOOL_DEFINITIONS}
+_TOOLS_BY_STAGE: Dict[str, List[Dict[str, Any]]] = {
+    "intake": [_TOOLS_BY_NAME[name] for name in (
+        "web_search", "get_patient_context", "get_care_plan_protocols", "get_recent_events",
+        "log_symptom_event", "log_wellness_check", "escalate_to_human"
+    )],
+    # Patient context is already in hand; triage can now close the loop
+    "triage": [_TOOLS_BY_NAME[name] for name in (
+        "web_search", "get_care_plan_protocols", "get_recent_events", "log_symptom_event",
+        "log_wellness_check", "log_workflow_result", "create_followup_task", "escalate_to_human"
+    )],
+}
+_TRIAGE_TRIGGER_TOOLS = frozenset({"log_symptom_event", "get_care_plan_protocols"})
+
+
+def _pretty_observation(result_str: str) -> str:
+    """
+    Indented form of a JSON tool result for the UI trace. Claude gets the
+    compact string; indentation would only add prefill tokens there.
+    """
+    if not result_str.startswith(("{", "[")):
+        return result_str
+    try:
+        return orjson.dumps(orjson.loads(result_str), option=orjson.OPT_INDENT_2).decode()
+    except orjson.JSONDecodeError:
+        return result_str
+
+
+def _trim(result_str: str, max_tokens: int = TOOL_RESULT_MAX_TOKENS) -> str:
+    """Cap a tool result to roughly max_tokens (~4 chars per token)."""
+    max_chars = max_tokens * 4
+    if len(result_str) <= max_chars:
+        return result_str
+    return result_str[:max_chars] + f"... [truncated {len(result_str) - max_chars} chars]"
+
+
+def _with_cache_breakpoint(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Copy of messages with a cache_control breakpoint on the last one.
+    
+    The breakpoint moves forward every call (new user turn, then each round of
+    tool results), so each request reads the prefix the previous one wrote.
+    The last message is always a user message: plain text or tool_result dicts.
+    """
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        blocks = [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+    elif content and isinstance(content[-1], dict):
+        blocks = content[:-1] + [{**content[-1], "cache_control": {"type": "ephemeral"}}]
+    else:
+        return messages
+    return messages[:-1] + [{**last, "content": blocks}]
+
+
+# ============================================================================
+# Tool Handlers
+# ============================================================================
+# Shared compiled validators for tool inputs, and enum lookups by value
+_SYMPTOM_ADAPTER = TOOL_INPUT_ADAPTERS[SymptomInput]
+_WELLNESS_ADAPTER = TOOL_INPUT_ADAPTERS[WellnessInput]
+_WORKFLOW_ADAPTER = TOOL_INPUT_ADAPTERS[WorkflowResultInput]
+_FOLLOWUP_ADAPTER = TOOL_INPUT_ADAPTERS[FollowupTaskInput]
+_ESCALATION_ADAPTER = TOOL_INPUT_ADAPTERS[EscalationInput]
+_ROUTE_MAP = {route.value: route for route in TriageRoute}
+_URGENCY_MAP = {urgency.value: urgency for urgency in TaskUrgency}
+
+# Each handler takes (tool_input, patient_id) and returns (result, result_str).
+# Missing optional inputs fall back to the same defaults Claude is told about.
+# Event logs go into the store immediately but their disk write is batched
+# (see queue_event); escalations are always handled synchronously.
+
+def _run_web_search(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    result = web_search(
+        query=tool_input.get("query", ""),
+        max_results=tool_input.get("max_results", 5)
+    )
+    return result, result.model_dump_json()
+
+
+async def _arun_web_search(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    result = await aweb_search(
+        query=tool_input.get("query", ""),
+        max_results=tool_input.get("max_results", 5)
+    )
+    return result, result.model_dump_json()
+
+
+def _run_get_patient_context(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    result = get_patient_context(tool_input.get("patient_id", patient_id))
+    return result, result.model_dump_json()
+
+
+def _run_get_care_plan_protocols(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    result = get_care_plan_protocols(
+        patient_id=tool_input.get("patient_id", patient_id),
+        chief_complaint=tool_input.get("chief_complaint")
+    )
+    return result, _dump_json_list(result)
+
+
+def _run_get_recent_events(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    result = get_recent_events(
+        patient_id=tool_input.get("patient_id", patient_id),
+        window_hours=tool_input.get("window_hours", 168),
+        event_types=tool_input.get("event_types")
+    )
+    # Newest first from the store; older events rarely change the answer
+    return result, _dump_json_list(result[:MAX_RECENT_EVENTS])
+
+
+def _run_log_symptom_event(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    symptom = _SYMPTOM_ADAPTER.validate_python({
+        "name": tool_input.get("name", "Unknown"),
+        "severity": tool_input.get("severity", 5),
+        "trend": tool_input.get("trend"),
+        "notes": tool_input.get("notes")
+    })
+    result = build_symptom_event(patient_id, symptom)
+    queue_event(result)
+    return result, f"Logged symptom: {symptom.name} (severity {symptom.severity}/10)"
+
+
+def _run_log_wellness_check(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    wellness = _WELLNESS_ADAPTER.validate_python({
+        "mood": tool_input.get("mood", 3),
+        "anxiety": tool_input.get("anxiety", 5),
+        "notes": tool_input.get("notes")
+    })
+    result = build_wellness_event(patient_id, wellness)
+    queue_event(result)
+    return result, f"Logged wellness: mood {wellness.mood}/5, anxiety {wellness.anxiety}/10"
+
+
+def _run_log_workflow_result(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    route_str = tool_input.get("route", "green")
+    workflow_result = _WORKFLOW_ADAPTER.validate_python({
+        "route": _ROUTE_MAP[route_str],
+        "patient_summary": tool_input.get("patient_summary", ""),
+        "clinician_summary": tool_input.get("clinician_summary"),
+        "safety_flags": tool_input.get("safety_flags", []),
+        "escalation_trigger": tool_input.get("escalation_trigger")
+    })
+    result = build_workflow_result_event(patient_id, workflow_result)
+    queue_event(result)
+    return result, f"Logged triage result: {route_str.upper()} route"
+
+
+def _run_create_followup_task(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    task = _FOLLOWUP_ADAPTER.validate_python({
+        "urgency": _URGENCY_MAP[tool_input.get("urgency", "routine")],
+        "summary": tool_input.get("summary", ""),
+        "context": tool_input.get("context")
+    })
+    result = create_followup_task(patient_id, task)
+    return result, f"Created follow-up task: {task.summary}"
+
+
+def _run_escalate_to_human(tool_input: Dict, patient_id: str) -> Tuple[Any, str]:
+    escalation = _ESCALATION_ADAPTER.validate_python({
+        "reason": tool_input.get("reason", ""),
+        "severity": tool_input.get("severity", "high")
+    })
+    result = escalate_to_human(patient_id, escalation)
+    return result, f"ESCALATED: {escalation.reason} - Care team notified"
+
+
+_TOOL_HANDLERS: Dict[str, Callable[[Dict, str], Tuple[Any, str]]] = {
+    "web_search": _run_web_search,
+    "get_patient_context": _run_get_patient_context,
+    "get_care_plan_protocols": _run_get_care_plan_protocols,
+    "get_recent_events": _run_get_recent_events,
+    "log_symptom_event": _run_log_symptom_event,
+    "log_wellness_check": _run_log_wellness_check,
+    "log_workflow_result": _run_log_workflow_result,
+    "create_followup_task": _run_create_followup_task,
+    "escalate_to_human": _run_escalate_to_human,
+}
+
+# Tools with a native async implementation, preferred over _TOOL_HANDLERS
+_ASYNC_TOOL_HANDLERS: Dict[str, Callable[[Dict, str], Awaitable[Tuple[Any, str]]]] = {
+    "web_search": _arun_web_search,
+}
+
+
 # ============================================================================
 # Agent Implementation
 # ============================================================================
@@ -345,6 +615,8 @@ class ReactAgent:
     
     def __init__(self):
         self.client = None
+        # The templated greeting saves an API round-trip before the first turn
+        self.llm_greeting = os.getenv("REACT_LLM_GREETING", "false").lower() == "true"
         self._init_client()
     
     def _init_client(self):
@@ -356,10 +628,28 @@ class ReactAgent:
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
         
-        self.client = Anthropic(api_key=api_key)
+        self.client = AsyncAnthropic(api_key=api_key)
+    
+    def _static_greeting(self, patient_id: str) -> str:
+        """Templated greeting addressed to the patient by first name when known."""
+        try:
+            profile = get_patient_context(patient_id).profile
+        except Exception:
+            profile = None
+        if profile and profile.name:
+            return GREETING_TEMPLATE.format(name=profile.name.split()[0])
+        return DEFAULT_GREETING
     
     def _get_patient_context_text(self, patient_id: str) -> str:
-        """Get formatted patient context for the system prompt."""
+        """Get formatted patient context for the system prompt (cached briefly)."""
+        text = _patient_context_text_cache.get(patient_id)
+        if text is None:
+            text = self._format_patient_context(patient_id)
+            _patient_context_text_cache[patient_id] = text
+        return text
+    
+    def _format_patient_context(self, patient_id: str) -> str:
+        """Format patient context for the system prompt."""
         try:
             ctx = get_patient_context(patient_id)
             if ctx.profile:
@@ -380,110 +670,143 @@ class ReactAgent:
             patient_context=patient_context
         )
     
+    async def _get_system_blocks(self, patient_id: str, conversation_id: str) -> List[Dict[str, Any]]:
+        """System prompt as a cache_control block, built once per conversation."""
+        key = (patient_id, conversation_id)
+        blocks = _system_prompt_cache.get(key) if conversation_id else None
+        if blocks is None:
+            system_prompt = await asyncio.to_thread(self._build_system_prompt, patient_id)
+            blocks = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"}
+            }]
+            if conversation_id:
+                _system_prompt_cache[key] = blocks
+        return blocks
+    
+    async def _aexecute_tool(
+        self,
+        tool_name: str,
+        tool_input: Dict,
+        patient_id: str,
+        conversation_id: str,
+        prefetched: Optional[Dict[str, asyncio.Task]] = None
+    ) -> Tuple[Any, str]:
+        """
+        Execute a tool without blocking the event loop, memoizing read-only
+        results per conversation. Async handlers are awaited directly; the
+        rest run in a worker thread. A matching speculative call started in
+        `prefetched` (same tool, this patient) is awaited instead of re-run.
+        """
+        task = (prefetched or {}).get(tool_name)
+        if task is not None and tool_input.get("patient_id", patient_id) == patient_id:
+            # Used once; later calls in the turn go through the normal path
+            del prefetched[tool_name]
+            try:
+                return await task
+            except Exception as e:
+                return None, f"Tool error: {str(e)}"
+        
+        key = None
+        if conversation_id:
+            if tool_name in _READ_ONLY_TOOLS:
+                key = (tool_name, orjson.dumps(tool_input, option=orjson.OPT_SORT_KEYS))
+                cached = _tool_result_cache.get(conversation_id, {}).get(key)
+                if cached is not None:
+                    return cached
+            else:
+                # Writes can change what the read tools return
+                _tool_result_cache.pop(conversation_id, None)
+        
+        async_handler = _ASYNC_TOOL_HANDLERS.get(tool_name)
+        if async_handler is not None:
+            try:
+                outcome = await async_handler(tool_input, patient_id)
+            except Exception as e:
+                outcome = (None, f"Tool error: {str(e)}")
+        else:
+            outcome = await asyncio.to_thread(self._execute_tool, tool_name, tool_input, patient_id)
+        
+        if key is not None and outcome[0] is not None:  # don't cache errors
+            _tool_result_cache.setdefault(conversation_id, {})[key] = outcome
+        elif conversation_id and tool_name not in _READ_ONLY_TOOLS:
+            # Again once the write has landed: a read running concurrently in
+            # the same turn may have cached what it saw before the write
+            _tool_result_cache.pop(conversation_id, None)
+        return outcome
+    
     def _execute_tool(self, tool_name: str, tool_input: Dict, patient_id: str) -> tuple[Any, str]:
         """Execute a tool and return the result."""
+        handler = _TOOL_HANDLERS.get(tool_name)
+        if handler is None:
+            return None, f"Unknown tool: {tool_name}"
         try:
-            if tool_name == "web_search":
-                result = web_search(
-                    query=tool_input.get("query", ""),
-                    max_results=tool_input.get("max_results", 5)
-                )
-                return result, json.dumps(result.dict(), indent=2)
-            
-            elif tool_name == "get_patient_context":
-                pid = tool_input.get("patient_id", patient_id)
-                result = get_patient_context(pid)
-                return result, json.dumps(result.dict(), indent=2, default=str)
-            
-            elif tool_name == "get_care_plan_protocols":
-                pid = tool_input.get("patient_id", patient_id)
-                result = get_care_plan_protocols(
-                    patient_id=pid,
-                    chief_complaint=tool_input.get("chief_complaint")
-                )
-                return result, json.dumps([p.dict() for p in result], indent=2)
-            
-            elif tool_name == "get_recent_events":
-                pid = tool_input.get("patient_id", patient_id)
-                result = get_recent_events(
-                    patient_id=pid,
-                    window_hours=tool_input.get("window_hours", 168),
-                    event_types=tool_input.get("event_types")
-                )
-                return result, json.dumps([e.dict() for e in result], indent=2, default=str)
-            
-            elif tool_name == "log_symptom_event":
-                symptom = SymptomInput(
-                    name=tool_input.get("name", "Unknown"),
-                    severity=tool_input.get("severity", 5),
-                    trend=tool_input.get("trend"),
-                    notes=tool_input.get("notes")
-                )
-                result = log_symptom_event(patient_id, symptom)
-                return result, f"Logged symptom: {symptom.name} (severity {symptom.severity}/10)"
-            
-            elif tool_name == "log_wellness_check":
-                wellness = WellnessInput(
-                    mood=tool_input.get("mood", 3),
-                    anxiety=tool_input.get("anxiety", 5),
-                    notes=tool_input.get("notes")
-                )
-                result = log_wellness_check(patient_id, wellness)
-                return result, f"Logged wellness: mood {wellness.mood}/5, anxiety {wellness.anxiety}/10"
-            
-            elif tool_name == "log_workflow_result":
-                route_str = tool_input.get("route", "green")
-                route = TriageRoute(route_str)
-                workflow_result = WorkflowResultInput(
-                    route=route,
-                    patient_summary=tool_input.get("patient_summary", ""),
-                    clinician_summary=tool_input.get("clinician_summary"),
-                    safety_flags=tool_input.get("safety_flags", []),
-                    escalation_trigger=tool_input.get("escalation_trigger")
-                )
-                result = log_workflow_result(patient_id, workflow_result)
-                return result, f"Logged triage result: {route_str.upper()} route"
-            
-            elif tool_name == "create_followup_task":
-                urgency_str = tool_input.get("urgency", "routine")
-                urgency = TaskUrgency(urgency_str)
-                task = FollowupTaskInput(
-                    urgency=urgency,
-                    summary=tool_input.get("summary", ""),
-                    context=tool_input.get("context")
-                )
-                result = create_followup_task(patient_id, task)
-                return result, f"Created follow-up task: {task.summary}"
-            
-            elif tool_name == "escalate_to_human":
-                escalation = EscalationInput(
-                    reason=tool_input.get("reason", ""),
-                    severity=tool_input.get("severity", "high")
-                )
-                result = escalate_to_human(patient_id, escalation)
-                return result, f"ESCALATED: {escalation.reason} - Care team notified"
-            
-            else:
-                return None, f"Unknown tool: {tool_name}"
-                
+            return handler(tool_input, patient_id)
         except Exception as e:
             return None, f"Tool error: {str(e)}"
     
-    def process_message(self, request: ChatRequest) -> ChatResponse:
+    async def process_message(self, request: ChatRequest) -> ChatResponse:
         """Process a user message using the ReAct loop."""
+        async for event in self.stream_events(request):
+            if event["type"] == "final":
+                return ChatResponse(
+                    text=event["text"],
+                    state=event["state"],
+                    trace=event["trace"],
+                    tool_calls=event["tool_calls"]
+                )
+    
+    async def stream_events(self, request: ChatRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Run the ReAct loop, yielding events as they happen:
+        - {"type": "token", "text": ...} for each text delta from Claude
+        - {"type": "trace", "step": TraceStep} for each thought/action/observation
+        - {"type": "final", "text", "state", "trace", "tool_calls"} once the turn is done
+        
+        Tokens from tool-use rounds are the model's thoughts; the final event
+        carries the answer text on its own.
+        """
         state = request.state
         patient_id = state.patient_id
         
+        # Chosen once per turn: follow-up calls carrying tool_use blocks need
+        # the same tools even if the stage advances mid-turn
+        active_tools = _TOOLS_BY_STAGE.get(state.stage, TOOL_DEFINITIONS)
+        
+        # Intake turns almost always open with get_patient_context; start the
+        # store read now so it overlaps Claude's first call instead of following it
+        prefetched: Dict[str, asyncio.Task] = {}
+        if any(tool["name"] == "get_patient_context" for tool in active_tools):
+            prefetched["get_patient_context"] = asyncio.create_task(
+                asyncio.to_thread(_run_get_patient_context, {}, patient_id)
+            )
+        
         # Build system prompt
-        system_prompt = self._build_system_prompt(patient_id)
+        system_prompt = await self._get_system_blocks(patient_id, state.conversation_id)
+        
+        # State messages are validated to Claude's {role, content} shape, so the
+        # recent window is sent as-is (the slice is a copy; appends below don't
+        # touch state)
+        start = max(len(state.messages) - MAX_HISTORY_MESSAGES, 0)
+        if start:
+            while start < len(state.messages) and state.messages[start]["role"] != "user":
+                start += 1
+        claude_messages = state.messages[start:]
         
-        # Convert state messages to Claude format
-        claude_messages = []
-        for msg in state.messages:
-            claude_messages.append({
-                "role": msg["role"],
-                "content": msg["content"]
-            })
+        # Second history breakpoint at the end of the previous turn: it stays
+        # put for this whole turn while the per-call breakpoint moves with each
+        # tool round, so long tool loops can't push it out of cache lookback
+        # (system, tools and these two make Anthropic's limit of four)
+        if claude_messages and claude_messages[-1]["role"] == "assistant":
+            claude_messages[-1] = {
+                "role": "assistant",
+                "content": [{
+                    "type": "text",
+                    "text": claude_messages[-1]["content"],
+                    "cache_control": {"type": "ephemeral"}
+                }]
+            }
         
         # Add the new user message
         claude_messages.append({
@@ -495,18 +818,33 @@ class ReactAgent:
         trace = []
         tool_calls = []
         
+        model = REACT_FAST_MODEL
+        final_text = None
+        
         try:
-            # Initial call to Claude
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=2048,
-                system=system_prompt,
-                tools=TOOL_DEFINITIONS,
-                messages=claude_messages
-            )
-            
             # ReAct loop - keep going while Claude wants to use tools
-            while response.stop_reason == "tool_use":
+            while True:
+                async with self.client.messages.stream(
+                    model=model,
+                    max_tokens=REACT_MAX_TOKENS,
+                    system=system_prompt,
+                    tools=active_tools,
+                    messages=_with_cache_breakpoint(claude_messages)
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield {"type": "token", "text": text}
+                    response = await stream.get_final_message()
+                
+                usage = response.usage
+                logger.debug(
+                    "react call model=%s input=%s cache_read=%s cache_write=%s output=%s",
+                    model, usage.input_tokens, usage.cache_read_input_tokens,
+                    usage.cache_creation_input_tokens, usage.output_tokens
+                )
+                
+                if response.stop_reason != "tool_use":
+                    break
+                
                 # Extract text (Thought) and tool calls (Action)
                 thought_text = ""
                 tool_use_blocks = []
@@ -519,94 +857,108 @@ class ReactAgent:
                                 step_type="thought",
                                 content=thought_text
                             ))
+                            yield {"type": "trace", "step": trace[-1]}
                     elif block.type == "tool_use":
                         tool_use_blocks.append(block)
+                        if block.name in _DEEP_REASONING_TOOLS or block.input.get("safety_flags"):
+                            model = REACT_MODEL
+                        if block.name in _TRIAGE_TRIGGER_TOOLS:
+                            state.stage = "triage"
                 
-                # Process each tool call
-                tool_results = []
+                # Add an Action to the trace for each tool call
                 for tool_block in tool_use_blocks:
-                    tool_name = tool_block.name
-                    tool_input = tool_block.input
-                    
-                    # Add Action to trace
                     trace.append(TraceStep(
                         step_type="action",
-                        content=f"Calling {tool_name}",
-                        tool_name=tool_name,
-                        tool_input=tool_input
+                        content=f"Calling {tool_block.name}",
+                        tool_name=tool_block.name,
+                        tool_input=tool_block.input
                     ))
-                    
-                    # Execute the tool
-                    result, result_str = self._execute_tool(tool_name, tool_input, patient_id)
-                    
+                    yield {"type": "trace", "step": trace[-1]}
+                
+                # Tool calls in one turn are independent store/web calls, so run
+                # them concurrently (gather keeps order)
+                results = await asyncio.gather(*[
+                    self._aexecute_tool(
+                        block.name, block.input, patient_id, state.conversation_id, prefetched
+                    )
+                    for block in tool_use_blocks
+                ])
+                
+                tool_results = []
+                for tool_block, (result, result_str) in zip(tool_use_blocks, results):
                     # Add Observation to trace
                     trace.append(TraceStep(
                         step_type="observation",
-                        content=result_str[:1000]  # Truncate long results
+                        content=_pretty_observation(result_str)[:1000]  # Truncate long results
                     ))
+                    yield {"type": "trace", "step": trace[-1]}
                     
                     # Record for response
                     tool_calls.append({
-                        "tool": tool_name,
-                        "input": tool_input,
+                        "tool": tool_block.name,
+                        "input": tool_block.input,
                         "output": result_str[:500]
                     })
                     
                     tool_results.append({
                         "type": "tool_result",
                         "tool_use_id": tool_block.id,
-                        "content": result_str
+                        "content": _trim(result_str)
                     })
                 
-                # Continue the conversation with tool results
+                # Red route: the care team is already alerted, so answer from a
+                # template instead of waiting on another model round-trip
+                escalation = next((
+                    block for block, (result, _) in zip(tool_use_blocks, results)
+                    if block.name == "escalate_to_human" and result is not None
+                ), None)
+                if escalation is not None:
+                    final_text = ESCALATION_REPLY.format(
+                        reason=escalation.input.get("reason") or "your symptoms"
+                    )
+                    yield {"type": "token", "text": final_text}
+                    break
+                
+                # Continue the conversation with tool results (blocks dumped to plain
+                # dicts once, so later calls don't re-serialize the SDK models)
                 claude_messages.append({
                     "role": "assistant",
-                    "content": response.content
+                    "content": [block.model_dump(exclude_none=True) for block in response.content]
                 })
                 claude_messages.append({
                     "role": "user",
                     "content": tool_results
                 })
-                
-                # Call Claude again
-                response = self.client.messages.create(
-                    model="claude-sonnet-4-20250514",
-                    max_tokens=2048,
-                    system=system_prompt,
-                    tools=TOOL_DEFINITIONS,
-                    messages=claude_messages
-                )
             
             # Extract final response text
-            final_text = ""
-            for block in response.content:
-                if block.type == "text":
-                    final_text += block.text
-            
-            # Update state with the conversation
-            state.messages.append({"role": "user", "content": request.text})
-            state.messages.append({"role": "assistant", "content": final_text})
-            
-            return ChatResponse(
-                text=final_text,
-                state=state,
-                trace=trace,
-                tool_calls=tool_calls
-            )
+            if final_text is None:
+                final_text = ""
+                for block in response.content:
+                    if block.type == "text":
+                        final_text += block.text
             
         except Exception as e:
-            error_msg = f"I apologize, I encountered an issue. Please try again or contact your care team if urgent. (Error: {str(e)})"
-            state.messages.append({"role": "user", "content": request.text})
-            state.messages.append({"role": "assistant", "content": error_msg})
-            
-            return ChatResponse(
-                text=error_msg,
-                state=state,
-                trace=trace,
-                tool_calls=tool_calls
-            )
+            final_text = f"I apologize, I encountered an issue. Please try again or contact your care team if urgent. (Error: {str(e)})"
+            yield {"type": "token", "text": final_text}
+        
+        # An unused prefetch finishes harmlessly in its thread; just don't
+        # leave its outcome (or error) unretrieved
+        for task in prefetched.values():
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        
+        # Update state with the conversation
+        state.messages.append({"role": "user", "content": request.text})
+        state.messages.append({"role": "assistant", "content": final_text})
+        
+        yield {
+            "type": "final",
+            "text": final_text,
+            "state": state,
+            "trace": trace,
+            "tool_calls": tool_calls
+        }
     
-    def start_conversation(self, patient_id: str) -> ChatResponse:
+    async def start_conversation(self, patient_id: str) -> ChatResponse:
         """Start a new conversation with a greeting."""
         import uuid
         
@@ -616,24 +968,27 @@ class ReactAgent:
             conversation_id=str(uuid.uuid4())
         )
         
-        # Build system prompt
-        system_prompt = self._build_system_prompt(patient_id)
+        # Build system prompt (also warms it for the first real turn)
+        system_prompt = await self._get_system_blocks(patient_id, state.conversation_id)
+        
+        if not self.llm_greeting:
+            greeting = await asyncio.to_thread(self._static_greeting, patient_id)
+            state.messages.append({"role": "assistant", "content": greeting})
+            return ChatResponse(text=greeting, state=state, trace=[], tool_calls=[])
         
         try:
-            response = self.client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=512,
+            greeting = ""
+            async with self.client.messages.stream(
+                model=REACT_MODEL,
+                max_tokens=GREETING_MAX_TOKENS,
                 system=system_prompt,
                 messages=[{
                     "role": "user",
                     "content": "Please introduce yourself and ask how you can help today."
                 }]
-            )
-            
-            greeting = ""
-            for block in response.content:
-                if block.type == "text":
-                    greeting += block.text
+            ) as stream:
+                async for text in stream.text_stream:
+                    greeting += text
             
             state.messages.append({"role": "assistant", "content": greeting})
             
@@ -645,7 +1000,7 @@ class ReactAgent:
             )
             
         except Exception as e:
-            greeting = "Hello! I'm your health assistant. How can I help you today?"
+            greeting = DEFAULT_GREETING
             state.messages.append({"role": "assistant", "content": greeting})
             
             return ChatResponse(
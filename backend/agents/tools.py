@@ -15,21 +15,56 @@ Usage with LLM function calling:
     defining the parameter schemas.
 """
 
+import re
+import html
+import time
 import uuid
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, Field
+import atexit
+import inspect
+import asyncio
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 import httpx
+import orjson
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+    LexborHTMLParser = None
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+    re2 = None
+
+try:
+    import numpy as np
+    from fastembed import TextEmbedding
+    FASTEMBED_AVAILABLE = True
+except ImportError:
+    FASTEMBED_AVAILABLE = False
+    TextEmbedding = None
 
-import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if __name__ == "__main__":
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from store import store
 from schemas import (
     PatientProfile, BaseEvent, SymptomEvent, WellnessEvent, WorkflowResultEvent,
-    EventType, EventSource, SymptomMeasurement, Severity,
-    TriageRoute, TaskUrgency, TaskStatus, FollowupTask
+    EventType, EventSource, TriageRoute, TaskUrgency, TaskStatus, FollowupTask
 )
 
 
@@ -47,6 +82,9 @@ class PatientContext(BaseModel):
 
 class CareProtocol(BaseModel):
     """Clinical guidelines and escalation criteria for a specific complaint."""
+    # Protocols are shared constants (see _PROTOCOLS_BY_KEY)
+    model_config = ConfigDict(frozen=True)
+    
     name: str
     description: str
     complaint: str
@@ -124,6 +162,17 @@ class WebSearchResponse(BaseModel):
     source: str = "duckduckgo"
 
 
+# Prebuilt validators for tool inputs arriving from outside (the webhook), so
+# the validation schema is compiled once rather than per request
+TOOL_INPUT_ADAPTERS: Dict[type, TypeAdapter] = {
+    model: TypeAdapter(model)
+    for model in (
+        SymptomInput, WellnessInput, WorkflowResultInput,
+        FollowupTaskInput, EscalationInput
+    )
+}
+
+
 # ============================================================================
 # Tool Functions
 # ============================================================================
@@ -146,82 +195,450 @@ def web_search(query: str, max_results: int = 5) -> WebSearchResponse:
         results = web_search("nausea management during chemotherapy")
         # Returns relevant medical information from trusted sources
     """
+    key, embedding, cached_response = _lookup_search(query, max_results)
+    if cached_response is not None:
+        return cached_response
+    if not _search_breaker.allow():
+        return _search_error(query, _SEARCH_UNAVAILABLE)
     try:
-        # Use DuckDuckGo HTML search (no API key required)
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        
-        # DuckDuckGo lite/html endpoint
-        params = {
-            "q": query,
-            "kl": "us-en",  # US English results
-        }
-        
-        response = httpx.get(
-            "https://html.duckduckgo.com/html/",
-            params=params,
-            headers=headers,
-            timeout=10.0,
-            follow_redirects=True
+        response = _HTTP.get(_INSTANT_ANSWER_URL, params=_instant_answer_params(query))
+        response.raise_for_status()
+        result = _parse_instant_answer(query, response.content, max_results)
+    except Exception:
+        result = None  # fall back to the HTML results page
+    try:
+        if result is None:
+            result = _parse_search_results(query, _fetch_results_page(query), max_results)
+    except Exception as e:
+        _search_breaker.record_failure()
+        return _search_error(query, e)
+    _search_breaker.record_success()
+    return _store_search(key, embedding, result)
+
+
+# Use DuckDuckGo HTML search (no API key required). The Instant Answer JSON
+# API is tried first: a few KB of JSON instead of a full results page to parse.
+_INSTANT_ANSWER_URL = "https://api.duckduckgo.com/"
+_SEARCH_URL = "https://html.duckduckgo.com/html/"
+_SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+# Shared sync client for web_search: repeat searches in a conversation reuse a
+# pooled keep-alive connection instead of a fresh TCP+TLS handshake each call
+_HTTP = httpx.Client(
+    http2=True,
+    timeout=10.0,
+    follow_redirects=True,
+    headers=_SEARCH_HEADERS,
+    limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+)
+atexit.register(_HTTP.close)
+
+# Search responses by normalized (query, max_results); the same medical
+# question comes up across turns and sessions. Errors are never cached.
+_search_cache: TTLCache = TTLCache(maxsize=512, ttl=30 * 60)
+
+
+def _search_cache_key(query: str, max_results: int) -> tuple:
+    return (query.strip().lower(), max_results)
+
+
+# Semantic layer over _search_cache: patients phrase the same question many
+# ways ("nausea from chemo", "chemotherapy nausea management"), so a new query
+# close enough in embedding space to a recent one reuses its results. Only
+# active when fastembed is installed.
+SEMANTIC_CACHE_MODEL = "BAAI/bge-small-en-v1.5"
+SEMANTIC_CACHE_THRESHOLD = 0.93
+SEMANTIC_CACHE_TTL_SECONDS = 30 * 60
+SEMANTIC_CACHE_MAX_ENTRIES = 512
+
+# Dose-specific queries ("carboplatin 400 mg") and ones naming a drug must
+# stay exact, so they skip the semantic match: "carboplatin side effects" and
+# "cisplatin side effects" embed almost identically but need different answers
+_DOSE_PATTERN = re.compile(r"\d+(\.\d+)?\s*(mg|mcg|µg|g|ml|units?|iu)\b", re.IGNORECASE)
+_DRUG_PATTERN = re.compile(
+    # Common oncology/supportive-care name stems...
+    r"\b\w+(platin|mab|nib|taxel|rubicin|citabine|tecan|zomib|limus|lidomide|"
+    r"parib|ciclib|rozole|setron|grastim|pitant)\b"
+    # ...and frequent drugs without one
+    r"|\b(cyclophosphamide|ifosfamide|fluorouracil|5-?fu|methotrexate|etoposide|"
+    r"vincristine|vinblastine|vinorelbine|bleomycin|leucovorin|temozolomide|"
+    r"tamoxifen|dexamethasone|prednisone|olanzapine|metoclopramide|loperamide)\b",
+    re.IGNORECASE
+)
+
+# [(embedding, inserted_at, max_results, response)], oldest first; maxlen
+# drops the oldest entry once the cache is full
+_semantic_entries: "deque[Tuple[Any, float, int, WebSearchResponse]]" = deque(
+    maxlen=SEMANTIC_CACHE_MAX_ENTRIES
+)
+_semantic_lock = threading.Lock()
+_embedder = None
+_embedder_lock = threading.Lock()
+
+
+def get_embedder():
+    """Get or create the query embedding model (loaded on first use)."""
+    global _embedder
+    if _embedder is None:
+        with _embedder_lock:
+            if _embedder is None:
+                _embedder = TextEmbedding(model_name=SEMANTIC_CACHE_MODEL)
+    return _embedder
+
+
+def _embed_query(query: str):
+    """Unit-length embedding, so a dot product is the cosine similarity."""
+    vector = next(iter(get_embedder().embed([query.strip().lower()])))
+    return vector / np.linalg.norm(vector)
+
+
+def _semantic_match(embedding, max_results: int) -> Optional[WebSearchResponse]:
+    cutoff = time.monotonic() - SEMANTIC_CACHE_TTL_SECONDS
+    with _semantic_lock:
+        # Entries are in insertion order, so expired ones are a prefix
+        while _semantic_entries and _semantic_entries[0][1] < cutoff:
+            _semantic_entries.popleft()
+        candidates = [entry for entry in _semantic_entries if entry[2] == max_results]
+    if not candidates:
+        return None
+    scores = np.stack([entry[0] for entry in candidates]) @ embedding
+    best = int(np.argmax(scores))
+    if scores[best] >= SEMANTIC_CACHE_THRESHOLD:
+        return candidates[best][3]
+    return None
+
+
+def _lookup_search(query: str, max_results: int) -> Tuple[tuple, Any, Optional[WebSearchResponse]]:
+    """
+    Check the exact then the semantic search cache.
+    
+    Returns (cache key, query embedding or None, copy of the cached response or None);
+    the key and embedding are passed back to _store_search on a miss.
+    """
+    key = _search_cache_key(query, max_results)
+    hit = _search_cache.get(key)
+    embedding = None
+    if (
+        hit is None and FASTEMBED_AVAILABLE
+        and not _DOSE_PATTERN.search(query) and not _DRUG_PATTERN.search(query)
+    ):
+        try:
+            embedding = _embed_query(query)
+            hit = _semantic_match(embedding, max_results)
+        except Exception:
+            embedding = None  # embedding trouble shouldn't break search
+    if hit is None:
+        return key, embedding, None
+    # The hit keeps the query it was cached under; report the one asked
+    return key, embedding, hit.model_copy(deep=True, update={"query": query})
+
+
+def _store_search(key: tuple, embedding, result: WebSearchResponse) -> WebSearchResponse:
+    """Cache a parsed response (unless it's the no-results placeholder) and return a copy."""
+    if any(r.url for r in result.results):
+        _search_cache[key] = result
+        if embedding is not None:
+            with _semantic_lock:
+                _semantic_entries.append((embedding, time.monotonic(), key[1], result))
+        return result.model_copy(deep=True)
+    return result
+
+
+# Shared async client for aweb_search: concurrent searches in a ReAct turn
+# fan out over one keep-alive pool instead of each paying for a TLS handshake.
+# Created on first use (bound to the running loop), closed on app shutdown.
+_async_http: Optional[httpx.AsyncClient] = None
+
+# Cap on in-flight outbound searches, so a burst of parallel tool calls
+# can't hammer DuckDuckGo (and get rate limited)
+SEARCH_CONCURRENCY = 10
+_search_semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+
+def _get_async_http() -> httpx.AsyncClient:
+    global _async_http
+    if _async_http is None:
+        _async_http = httpx.AsyncClient(
+            http2=True,
+            timeout=5.0,
+            follow_redirects=True,
+            headers=_SEARCH_HEADERS,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
         )
+    return _async_http
+
+
+async def aclose_http_clients() -> None:
+    """Close the shared async HTTP client (app shutdown)."""
+    global _async_http
+    if _async_http is not None:
+        await _async_http.aclose()
+        _async_http = None
+
+
+async def aweb_search(query: str, max_results: int = 5) -> WebSearchResponse:
+    """Async web_search over the shared connection pool."""
+    if FASTEMBED_AVAILABLE:
+        # Embedding the query is CPU work; keep it off the event loop
+        key, embedding, cached_response = await asyncio.to_thread(_lookup_search, query, max_results)
+    else:
+        key, embedding, cached_response = _lookup_search(query, max_results)
+    if cached_response is not None:
+        return cached_response
+    if not _search_breaker.allow():
+        return _search_error(query, _SEARCH_UNAVAILABLE)
+    try:
+        async with _search_semaphore:
+            response = await _get_async_http().get(_INSTANT_ANSWER_URL, params=_instant_answer_params(query))
         response.raise_for_status()
-        
-        # Parse results from HTML (simplified extraction)
-        results = []
-        html = response.text
-        
-        # Extract result blocks - DuckDuckGo HTML has class="result"
-        import re
-        
-        # Find all result links and snippets
-        result_pattern = r'<a[^>]*class="result__a"[^>]*href="([^"]*)"[^>]*>([^<]*)</a>'
-        snippet_pattern = r'<a[^>]*class="result__snippet"[^>]*>([^<]*(?:<[^>]*>[^<]*)*)</a>'
-        
-        links = re.findall(result_pattern, html)
-        snippets = re.findall(snippet_pattern, html)
-        
-        for i, (url, title) in enumerate(links[:max_results]):
-            snippet = snippets[i] if i < len(snippets) else ""
-            # Clean up HTML entities and tags from snippet
-            snippet = re.sub(r'<[^>]+>', '', snippet)
-            snippet = snippet.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-            snippet = snippet.replace('&#x27;', "'").replace('&quot;', '"')
-            
-            if url and title:
-                results.append(WebSearchResult(
-                    title=title.strip(),
-                    snippet=snippet.strip()[:500],  # Limit snippet length
-                    url=url
-                ))
-        
-        # If regex parsing failed, return a helpful message
-        if not results:
+        result = _parse_instant_answer(query, response.content, max_results)
+    except Exception:
+        result = None  # fall back to the HTML results page
+    try:
+        if result is None:
+            result = _parse_search_results(query, await _afetch_results_page(query), max_results)
+    except Exception as e:
+        _search_breaker.record_failure()
+        return _search_error(query, e)
+    _search_breaker.record_success()
+    return _store_search(key, embedding, result)
+
+
+# Transient failures on the results page (dropped connections, timeouts, 5xx)
+# get two more tries with jittered backoff before the search reports an error
+_RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ReadTimeout, httpx.RemoteProtocolError)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, _RETRYABLE_ERRORS)
+
+
+_search_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=0.2, max=2.0),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True
+)
+
+
+@_search_retry
+def _fetch_results_page(query: str) -> bytes:
+    response = _HTTP.get(_SEARCH_URL, params=_search_params(query))
+    response.raise_for_status()
+    return response.content
+
+
+@_search_retry
+async def _afetch_results_page(query: str) -> bytes:
+    async with _search_semaphore:
+        response = await _get_async_http().get(_SEARCH_URL, params=_search_params(query))
+    response.raise_for_status()
+    return response.content
+
+
+class _CircuitBreaker:
+    """
+    Opens after `fail_max` consecutive failures. While open, calls are refused
+    until `reset_timeout` seconds pass; then one trial call is let through and
+    its outcome closes the breaker or re-arms the timeout.
+    """
+    
+    def __init__(self, fail_max: int, reset_timeout: float):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()  # admit one trial call
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
+
+# While DuckDuckGo is down, searches fail fast instead of each waiting out
+# retries and timeouts
+_search_breaker = _CircuitBreaker(fail_max=5, reset_timeout=30.0)
+_SEARCH_UNAVAILABLE = RuntimeError("search is temporarily unavailable")
+
+
+def _instant_answer_params(query: str) -> Dict[str, str]:
+    return {
+        "q": query,
+        "format": "json",
+        "no_html": "1",
+        "skip_disambig": "1",
+    }
+
+
+def _parse_instant_answer(query: str, content: bytes, max_results: int) -> Optional[WebSearchResponse]:
+    """Results from an Instant Answer response, or None when it has nothing to offer."""
+    data = orjson.loads(content)
+    results = []
+    if data.get("AbstractText") and data.get("AbstractURL"):
+        results.append(WebSearchResult(
+            title=data.get("Heading") or query,
+            snippet=data["AbstractText"][:500],
+            url=data["AbstractURL"]
+        ))
+    
+    # RelatedTopics mixes plain topics with named groups of them
+    topics = []
+    for topic in data.get("RelatedTopics") or []:
+        topics.extend(topic.get("Topics", [topic]))
+    
+    for topic in topics:
+        if len(results) >= max_results:
+            break
+        text, url = topic.get("Text", ""), topic.get("FirstURL", "")
+        if text and url:
             results.append(WebSearchResult(
-                title="Search completed",
-                snippet=f"Searched for: {query}. Please try a more specific medical query.",
-                url=""
+                title=text.split(" - ", 1)[0],
+                snippet=text[:500],
+                url=url
             ))
-        
-        return WebSearchResponse(
-            query=query,
-            results=results,
-            source="duckduckgo"
-        )
-        
-    except Exception as e:
-        # Return error as a result so agent can handle gracefully
-        return WebSearchResponse(
-            query=query,
-            results=[WebSearchResult(
-                title="Search Error",
-                snippet=f"Could not complete search: {str(e)}. Try rephrasing the query.",
-                url=""
-            )],
-            source="duckduckgo"
+    
+    if not results:
+        return None
+    return WebSearchResponse(query=query, results=results, source="duckduckgo")
+
+
+def _search_params(query: str) -> Dict[str, str]:
+    # DuckDuckGo lite/html endpoint
+    return {
+        "q": query,
+        "kl": "us-en",  # US English results
+    }
+
+
+def _parse_search_results(query: str, page: bytes, max_results: int) -> WebSearchResponse:
+    """Parse results from DuckDuckGo HTML (simplified extraction)."""
+    # Raw bytes go straight to Lexbor, skipping httpx's str decode of the page
+    if SELECTOLAX_AVAILABLE:
+        raw_results = _extract_results_lexbor(page, max_results)
+    else:
+        raw_results = _extract_results_regex(page.decode("utf-8", errors="replace"), max_results)
+    
+    results = [
+        WebSearchResult(
+            title=title.strip(),
+            snippet=snippet.strip()[:500],  # Limit snippet length
+            url=url
         )
+        for url, title, snippet in raw_results
+        if url and title
+    ]
+    
+    # If parsing found nothing, return a helpful message
+    if not results:
+        results.append(WebSearchResult(
+            title="Search completed",
+            snippet=f"Searched for: {query}. Please try a more specific medical query.",
+            url=""
+        ))
+    
+    return WebSearchResponse(
+        query=query,
+        results=results,
+        source="duckduckgo"
+    )
+
+
+def _extract_results_lexbor(page: bytes, max_results: int) -> List[tuple]:
+    """(url, title, snippet) per result block, parsed once by Lexbor."""
+    tree = LexborHTMLParser(page)
+    extracted = []
+    # Each DuckDuckGo hit is a div.result; reading link and snippet from the
+    # same block keeps them paired even when a hit has no snippet
+    for block in tree.css("div.result"):
+        link = block.css_first("a.result__a")
+        if link is None:
+            continue
+        snippet = block.css_first(".result__snippet")
+        extracted.append((
+            link.attributes.get("href") or "",
+            link.text(deep=True, separator=" ", strip=True),
+            # text() decodes entities and drops the <b> highlight tags
+            snippet.text(deep=True, separator=" ", strip=True) if snippet is not None else ""
+        ))
+        if len(extracted) >= max_results:
+            break
+    return extracted
 
 
+# Regex fallback patterns, compiled once at import. RE2 (when installed)
+# matches in linear time, so a malformed page can't backtrack for seconds
+_regex_engine = re2 if RE2_AVAILABLE else re
+_RESULT_RE = _regex_engine.compile(r'<a[^>]*class="result__a"[^>]*href="([^"]*)"[^>]*>([^<]*)</a>')
+_SNIPPET_RE = _regex_engine.compile(r'<a[^>]*class="result__snippet"[^>]*>([^<]*(?:<[^>]*>[^<]*)*)</a>')
+_TAG_RE = _regex_engine.compile(r'<[^>]+>')
+
+
+def _extract_results_regex(page: str, max_results: int) -> List[tuple]:
+    """Regex fallback for when selectolax isn't installed."""
+    # Find all result links and snippets
+    links = _RESULT_RE.findall(page)
+    snippets = _SNIPPET_RE.findall(page)
+    
+    extracted = []
+    for i, (url, title) in enumerate(links[:max_results]):
+        snippet = snippets[i] if i < len(snippets) else ""
+        # Clean up HTML tags and entities from snippet
+        snippet = html.unescape(_TAG_RE.sub('', snippet))
+        # href values are entity-encoded too (&amp; between query params)
+        extracted.append((html.unescape(url), html.unescape(title), snippet))
+    return extracted
+
+
+def _search_error(query: str, e: Exception) -> WebSearchResponse:
+    # Return error as a result so agent can handle gracefully
+    return WebSearchResponse(
+        query=query,
+        results=[WebSearchResult(
+            title="Search Error",
+            snippet=f"Could not complete search: {str(e)}. Try rephrasing the query.",
+            url=""
+        )],
+        source="duckduckgo"
+    )
+
+
+# Cross-session cache of patient contexts; profiles rarely change, and the
+# profile endpoints call invalidate_patient_context when they do
+_patient_context_cache: TTLCache = TTLCache(maxsize=2048, ttl=60)
+
+
+def invalidate_patient_context(patient_id: str) -> None:
+    """Drop the cached context for a patient (call after their profile changes)."""
+    _patient_context_cache.pop(hashkey(patient_id), None)
+
+
+# Keyed on patient_id alone, so positional and keyword calls (the tool webhook
+# passes arguments by name) share one entry and invalidation finds both
+@cached(
+    cache=_patient_context_cache,
+    key=lambda patient_id: hashkey(patient_id),
+    lock=threading.Lock()
+)
 def get_patient_context(patient_id: str) -> PatientContext:
     """
     Retrieve the full patient context including profile, treatment info, and concerns.
@@ -251,6 +668,88 @@ def get_patient_context(patient_id: str) -> PatientContext:
     )
 
 
+# Standard Oncology Red Flags (always included, listed first)
+_GENERAL_RED_FLAGS = (
+    "Fever ≥100.4°F (38°C)",
+    "Severe shortness of breath",
+    "Chest pain",
+    "Confusion or altered mental status",
+    "Uncontrolled bleeding"
+)
+_GENERAL_RED_FLAGS_SET = frozenset(_GENERAL_RED_FLAGS)
+
+
+def _protocol(name, desc, complaint, escalation, red_flags, side_effects, care) -> CareProtocol:
+    """Build a protocol with the general red flags merged in (in a stable order)."""
+    return CareProtocol(
+        name=name, description=desc, complaint=complaint,
+        escalation_criteria=escalation,
+        red_flags=list(_GENERAL_RED_FLAGS) + [rf for rf in red_flags if rf not in _GENERAL_RED_FLAGS_SET],
+        common_side_effects=side_effects,
+        supportive_care=care
+    )
+
+
+# Regimen-specific protocols by (regimen family, complaint keyword), built once
+# at import. CareProtocol is frozen, so the same objects are returned every call.
+_PROTOCOLS_BY_KEY: Dict[Tuple[str, str], CareProtocol] = {
+    ("nsclc", "headache"): _protocol(
+        "NSCLC Symptom Management - Neurological",
+        "Guidelines for neurological symptoms during Carboplatin/Pemetrexed",
+        "Headache",
+        {"red": "severity >= 8", "yellow": "severity >= 4 or worsening trend"},
+        ["New focal neurological deficit", "Sudden 'thunderclap' headache"],
+        ["Fatigue", "Dizziness"],
+        ["Acetaminophen per oncology guidelines", "Quiet, dark room"]
+    ),
+    ("nsclc", "nausea"): _protocol(
+        "NSCLC Symptom Management - GI",
+        "Guidelines for GI distress during Carboplatin/Pemetrexed",
+        "Nausea",
+        {"red": "unable to keep fluids down > 12h", "yellow": "severity >= 5"},
+        ["Severe abdominal pain", "Coffee-ground emesis"],
+        ["Decreased appetite"],
+        ["Ondansetron 8mg every 8h PRN", "Small, frequent meals"]
+    ),
+    ("folfox", "neuropathy"): _protocol(
+        "FOLFOX Neuropathy Protocol",
+        "Oxaliplatin-induced peripheral neuropathy monitoring",
+        "Neuropathy",
+        {"red": "functional impact (difficulty walking/buttoning)", "yellow": "new onset cold sensitivity"},
+        ["Severe muscle cramps", "Laryngopharyngeal dysesthesia"],
+        ["Tingling in hands/feet"],
+        ["Avoid cold foods/drinks for 5 days", "Wear gloves when reaching into freezer"]
+    ),
+}
+
+# Complaint keywords per regimen family, in the order protocols are returned
+_FAMILY_COMPLAINTS: Dict[str, Tuple[str, ...]] = {
+    "nsclc": ("headache", "nausea"),
+    "folfox": ("neuropathy",),
+}
+
+
+_COMPLAINT_KEYWORDS = tuple(k for keywords in _FAMILY_COMPLAINTS.values() for k in keywords)
+
+
+@lru_cache(maxsize=1024)
+def _complaint_keywords(chief_complaint: str) -> frozenset:
+    """Protocol keywords mentioned in a complaint (lowercased and scanned once per distinct complaint)."""
+    complaint = chief_complaint.lower()
+    return frozenset(keyword for keyword in _COMPLAINT_KEYWORDS if keyword in complaint)
+
+
+def _regimen_family(regimen: Optional[str]) -> Optional[str]:
+    """Protocol family for a regimen string (Carboplatin/Pemetrexed take precedence)."""
+    if not regimen:
+        return None
+    if "Carboplatin" in regimen or "Pemetrexed" in regimen:
+        return "nsclc"
+    if "FOLFOX" in regimen:
+        return "folfox"
+    return None
+
+
 def get_care_plan_protocols(patient_id: str, chief_complaint: Optional[str] = None) -> List[CareProtocol]:
     """
     Get relevant care protocols for a patient based on their regimen and chief complaint.
@@ -271,81 +770,53 @@ def get_care_plan_protocols(patient_id: str, chief_complaint: Optional[str] = No
         raise ValueError(f"Patient not found: {patient_id}")
     
     regimen = profile.current_treatment.regimen if profile.current_treatment else None
-    protocols = []
+    family = _regimen_family(regimen)
     
-    # Standard Oncology Red Flags (always included)
-    general_red_flags = [
-        "Fever ≥100.4°F (38°C)",
-        "Severe shortness of breath",
-        "Chest pain",
-        "Confusion or altered mental status",
-        "Uncontrolled bleeding"
-    ]
-
-    # Helper to create a protocol
-    def add_protocol(name, desc, complaint, escalation, red_flags, side_effects, care):
-        protocols.append(CareProtocol(
-            name=name, description=desc, complaint=complaint,
-            escalation_criteria=escalation,
-            red_flags=list(set(general_red_flags + red_flags)),
-            common_side_effects=side_effects,
-            supportive_care=care
-        ))
-
-    # Determine which protocols to return
-    is_headache = chief_complaint and "headache" in chief_complaint.lower()
-    is_nausea = chief_complaint and "nausea" in chief_complaint.lower()
-
-    if regimen:
-        if "Carboplatin" in regimen or "Pemetrexed" in regimen:
-            if is_headache or not chief_complaint:
-                add_protocol(
-                    "NSCLC Symptom Management - Neurological",
-                    "Guidelines for neurological symptoms during Carboplatin/Pemetrexed",
-                    "Headache",
-                    {"red": "severity >= 8", "yellow": "severity >= 4 or worsening trend"},
-                    ["New focal neurological deficit", "Sudden 'thunderclap' headache"],
-                    ["Fatigue", "Dizziness"],
-                    ["Acetaminophen per oncology guidelines", "Quiet, dark room"]
-                )
-            if is_nausea or not chief_complaint:
-                add_protocol(
-                    "NSCLC Symptom Management - GI",
-                    "Guidelines for GI distress during Carboplatin/Pemetrexed",
-                    "Nausea",
-                    {"red": "unable to keep fluids down > 12h", "yellow": "severity >= 5"},
-                    ["Severe abdominal pain", "Coffee-ground emesis"],
-                    ["Decreased appetite"],
-                    ["Ondansetron 8mg every 8h PRN", "Small, frequent meals"]
-                )
-
-        elif "FOLFOX" in regimen:
-            if "neuropathy" in (chief_complaint or "").lower() or not chief_complaint:
-                add_protocol(
-                    "FOLFOX Neuropathy Protocol",
-                    "Oxaliplatin-induced peripheral neuropathy monitoring",
-                    "Neuropathy",
-                    {"red": "functional impact (difficulty walking/buttoning)", "yellow": "new onset cold sensitivity"},
-                    ["Severe muscle cramps", "Laryngopharyngeal dysesthesia"],
-                    ["Tingling in hands/feet"],
-                    ["Avoid cold foods/drinks for 5 days", "Wear gloves when reaching into freezer"]
-                )
+    protocols = []
+    if family is not None:
+        # No complaint means every protocol for the regimen
+        mentioned = _complaint_keywords(chief_complaint) if chief_complaint else None
+        protocols = [
+            _PROTOCOLS_BY_KEY[(family, keyword)]
+            for keyword in _FAMILY_COMPLAINTS[family]
+            if mentioned is None or keyword in mentioned
+        ]
     
     # Fallback/General protocol if nothing specific matches
     if not protocols:
-        add_protocol(
-            "General Oncology Triage",
-            "Standard monitoring for oncology patients",
-            chief_complaint or "General",
-            {"red": "severity >= 8", "yellow": "severity >= 5"},
-            [],
-            ["Fatigue", "Mild nausea"],
-            ["Hydration", "Rest", "Log symptoms"]
-        )
-    
+        protocols = [_general_protocol(chief_complaint or "General")]
     return protocols
 
 
+@lru_cache(maxsize=256)
+def _general_protocol(complaint: str) -> CareProtocol:
+    """Standard protocol used when no regimen-specific one matches."""
+    return _protocol(
+        "General Oncology Triage",
+        "Standard monitoring for oncology patients",
+        complaint,
+        {"red": "severity >= 8", "yellow": "severity >= 5"},
+        [],
+        ["Fatigue", "Mild nausea"],
+        ["Hydration", "Rest", "Log symptoms"]
+    )
+
+
+# Enum members used on every logged event, bound once at import
+_ET_SYMPTOM = EventType.SYMPTOM
+_ET_WELLNESS = EventType.WELLNESS
+_ET_TREATMENT = EventType.TREATMENT
+_ET_WORKFLOW = EventType.WORKFLOW_RESULT
+_ES_VOICE = EventSource.VOICE
+
+# Event type names accepted by get_recent_events' filter
+_EVENT_TYPE_MAP: Dict[str, EventType] = {
+    "symptom": _ET_SYMPTOM,
+    "wellness": _ET_WELLNESS,
+    "treatment": _ET_TREATMENT,
+    "workflow_result": _ET_WORKFLOW,
+}
+
 
 def get_recent_events(
     patient_id: str, 
@@ -370,23 +841,33 @@ def get_recent_events(
         recent = get_recent_events("patient-123", window_hours=72)
         # Check if headache severity has increased over the last 3 days
     """
-    # Convert string event types to enum if provided
+    # Convert string event types to enum if provided (unknown types are dropped)
     type_filter = None
     if event_types:
-        type_filter = []
-        for et in event_types:
-            if et == "symptom":
-                type_filter.append(EventType.SYMPTOM)
-            elif et == "wellness":
-                type_filter.append(EventType.WELLNESS)
-            elif et == "treatment":
-                type_filter.append(EventType.TREATMENT)
-            elif et == "workflow_result":
-                type_filter.append(EventType.WORKFLOW_RESULT)
+        type_filter = [_EVENT_TYPE_MAP[et] for et in event_types if et in _EVENT_TYPE_MAP]
     
     return store.get_recent_events(patient_id, window_hours, type_filter)
 
 
+def _now_iso() -> str:
+    """Current UTC time as ISO 8601 with microseconds and a trailing Z."""
+    ns = time.time_ns()
+    seconds = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ns // 1_000_000_000))
+    return f"{seconds}.{(ns // 1000) % 1_000_000:06d}Z"
+
+
+def _new_event(event_type: EventType, patient_id: str, **fields) -> Dict[str, Any]:
+    """Event data with a fresh id and timestamp; the build_*_event helpers add their fields."""
+    return {
+        "id": uuid.uuid4().hex,
+        "patient_id": patient_id,
+        "timestamp": _now_iso(),
+        "event_type": event_type,
+        "source": _ES_VOICE,
+        **fields
+    }
+
+
 def log_symptom_event(patient_id: str, symptom: SymptomInput) -> SymptomEvent:
     """
     Log a structured symptom event to the patient's timeline.
@@ -409,26 +890,21 @@ def log_symptom_event(patient_id: str, symptom: SymptomInput) -> SymptomEvent:
             notes="Started after last infusion"
         ))
     """
-    event_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
-    
-    measurement = SymptomMeasurement(
-        name=symptom.name,
-        severity=Severity(value=symptom.severity, scale="0_10", label="user_reported"),
-        trend=symptom.trend,
-        rawAnswer=symptom.notes
-    )
-    
-    event_data = {
-        "id": event_id,
-        "patient_id": patient_id,
-        "timestamp": timestamp,
-        "event_type": EventType.SYMPTOM,
-        "source": EventSource.VOICE,
-        "measurements": [measurement.dict()]
+    return store.add_event(build_symptom_event(patient_id, symptom))
+
+
+def build_symptom_event(patient_id: str, symptom: SymptomInput) -> Dict[str, Any]:
+    """Event data for log_symptom_event (for callers that queue the write)."""
+    # Plain dict in SymptomMeasurement's shape: SymptomInput is already
+    # validated, and the store validates the event once when it builds it
+    measurement = {
+        "name": symptom.name,
+        "severity": {"value": symptom.severity, "scale": "0_10", "label": "user_reported"},
+        "trend": symptom.trend,
+        "rawAnswer": symptom.notes
     }
     
-    return store.add_event(event_data)
+    return _new_event(_ET_SYMPTOM, patient_id, measurements=[measurement])
 
 
 def log_wellness_check(patient_id: str, wellness: WellnessInput) -> WellnessEvent:
@@ -452,21 +928,17 @@ def log_wellness_check(patient_id: str, wellness: WellnessInput) -> WellnessEven
             notes="Worried about upcoming scan results"
         ))
     """
-    event_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
-    
-    event_data = {
-        "id": event_id,
-        "patient_id": patient_id,
-        "timestamp": timestamp,
-        "event_type": EventType.WELLNESS,
-        "source": EventSource.VOICE,
-        "mood": wellness.mood,
-        "anxiety": wellness.anxiety,
-        "notes": wellness.notes
-    }
-    
-    return store.add_event(event_data)
+    return store.add_event(build_wellness_event(patient_id, wellness))
+
+
+def build_wellness_event(patient_id: str, wellness: WellnessInput) -> Dict[str, Any]:
+    """Event data for log_wellness_check (for callers that queue the write)."""
+    return _new_event(
+        _ET_WELLNESS, patient_id,
+        mood=wellness.mood,
+        anxiety=wellness.anxiety,
+        notes=wellness.notes
+    )
 
 
 def log_workflow_result(
@@ -489,26 +961,26 @@ def log_workflow_result(
     Returns:
         The created WorkflowResultEvent
     """
-    event_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
-    
-    event_data = {
-        "id": event_id,
-        "patient_id": patient_id,
-        "timestamp": timestamp,
-        "event_type": EventType.WORKFLOW_RESULT,
-        "source": EventSource.VOICE,
-        "workflow_name": workflow_name,
-        "route": result.route,
-        "patient_summary": result.patient_summary,
-        "clinician_summary": result.clinician_summary,
-        "safety_flags": result.safety_flags,
-        "escalation_trigger": result.escalation_trigger,
-        "triage_confidence": result.confidence,
-        "structured_payload": result.structured_payload
-    }
-    
-    return store.add_event(event_data)
+    return store.add_event(build_workflow_result_event(patient_id, result, workflow_name))
+
+
+def build_workflow_result_event(
+    patient_id: str,
+    result: WorkflowResultInput,
+    workflow_name: str = "symptom_triage"
+) -> Dict[str, Any]:
+    """Event data for log_workflow_result (for callers that queue the write)."""
+    return _new_event(
+        _ET_WORKFLOW, patient_id,
+        workflow_name=workflow_name,
+        route=result.route,
+        patient_summary=result.patient_summary,
+        clinician_summary=result.clinician_summary,
+        safety_flags=result.safety_flags,
+        escalation_trigger=result.escalation_trigger,
+        triage_confidence=result.confidence,
+        structured_payload=result.structured_payload
+    )
 
 
 
@@ -536,8 +1008,8 @@ def create_followup_task(patient_id: str, task: FollowupTaskInput) -> FollowupTa
             triggered_by="workflow-result-456"
         ))
     """
-    task_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
+    task_id = uuid.uuid4().hex
+    timestamp = _now_iso()
     
     followup_task = FollowupTask(
         id=task_id,
@@ -569,8 +1041,8 @@ def escalate_to_human(patient_id: str, escalation: EscalationInput) -> Escalatio
     Returns:
         EscalationResult confirming the escalation was triggered
     """
-    escalation_id = str(uuid.uuid4())
-    timestamp = datetime.utcnow().isoformat() + "Z"
+    escalation_id = uuid.uuid4().hex
+    timestamp = _now_iso()
     
     # Log escalation as a workflow result with RED route
     result = WorkflowResultInput(
@@ -606,6 +1078,104 @@ def escalate_to_human(patient_id: str, escalation: EscalationInput) -> Escalatio
     )
 
 
+# ============================================================================
+# Async Variants
+# ============================================================================
+# The store is synchronous, so these run the lookups in a worker thread. That
+# keeps the event loop free and lets callers gather several reads in parallel.
+
+async def aget_patient_context(patient_id: str) -> PatientContext:
+    """Async get_patient_context."""
+    return await asyncio.to_thread(get_patient_context, patient_id)
+
+
+async def aget_care_plan_protocols(
+    patient_id: str,
+    chief_complaint: Optional[str] = None
+) -> List[CareProtocol]:
+    """Async get_care_plan_protocols."""
+    return await asyncio.to_thread(get_care_plan_protocols, patient_id, chief_complaint)
+
+
+async def aget_recent_events(
+    patient_id: str,
+    window_hours: int = 168,
+    event_types: Optional[List[str]] = None
+) -> List[BaseEvent]:
+    """Async get_recent_events."""
+    return await asyncio.to_thread(get_recent_events, patient_id, window_hours, event_types)
+
+
+# ============================================================================
+# Write-Behind Event Logging
+# ============================================================================
+# Chat agents only need the acknowledgement string from a log_* call, so the
+# event goes into the store right away (validated, and visible to later reads
+# in the same turn) while the disk write is left to the background writer,
+# which saves once per batch instead of once per event. Escalations never go
+# through here.
+
+EVENT_FLUSH_INTERVAL_SECONDS = 2.0
+EVENT_FLUSH_BATCH_SIZE = 20
+
+_unsaved_events = 0
+_unsaved_lock = threading.Lock()
+_event_writer_task: Optional[asyncio.Task] = None
+
+
+def queue_event(event_data: Dict[str, Any]) -> BaseEvent:
+    """
+    Add an event to the store and defer the disk write to the background
+    writer. Thread-safe; raises like store.add_event on invalid data, and
+    writes through immediately if the writer isn't running (scripts, CLI use).
+    """
+    global _unsaved_events
+    if _event_writer_task is None:
+        return store.add_event(event_data)
+    event = store.append_event(event_data)
+    with _unsaved_lock:
+        _unsaved_events += 1
+        flush_due = _unsaved_events >= EVENT_FLUSH_BATCH_SIZE
+    if flush_due:
+        flush_pending_events()
+    return event
+
+
+def flush_pending_events() -> int:
+    """Save the store if events were queued since the last flush. Returns how many."""
+    global _unsaved_events
+    with _unsaved_lock:
+        count, _unsaved_events = _unsaved_events, 0
+    if count:
+        store.save_data()
+    return count
+
+
+async def _event_writer_loop():
+    while True:
+        await asyncio.sleep(EVENT_FLUSH_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(flush_pending_events)
+        except Exception as e:
+            print(f"Error flushing queued events: {e}")
+
+
+def start_event_writer() -> None:
+    """Start the background writer on the running event loop (app startup)."""
+    global _event_writer_task
+    if _event_writer_task is None:
+        _event_writer_task = asyncio.get_running_loop().create_task(_event_writer_loop())
+
+
+async def stop_event_writer() -> None:
+    """Stop the background writer and persist anything still queued (app shutdown)."""
+    global _event_writer_task
+    if _event_writer_task is not None:
+        _event_writer_task.cancel()
+        _event_writer_task = None
+    await asyncio.to_thread(flush_pending_events)
+
+
 # ============================================================================
 # Tool Registry (for LLM function calling setup)
 # ============================================================================
@@ -687,3 +1257,40 @@ TOOL_REGISTRY = {
 }
 
 
+def _to_function_schema(name: str, entry: Dict[str, Any]) -> Dict[str, Any]:
+    """OpenAI-style function schema for a registry entry (parameters without a default are required)."""
+    signature = inspect.signature(entry["function"])
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": entry["description"],
+            "parameters": {
+                "type": "object",
+                "properties": entry["parameters"],
+                "required": [
+                    param for param in entry["parameters"]
+                    if signature.parameters[param].default is inspect.Parameter.empty
+                ]
+            }
+        }
+    }
+
+
+# Registry serializations, encoded once at import rather than on every
+# discovery request or LLM call
+_TOOL_SCHEMAS: Dict[str, str] = {
+    name: orjson.dumps(_to_function_schema(name, entry)).decode()
+    for name, entry in TOOL_REGISTRY.items()
+}
+_TOOL_SCHEMAS_JSON = "[" + ",".join(_TOOL_SCHEMAS.values()) + "]"
+
+TOOL_DEFINITIONS_JSON: bytes = orjson.dumps({
+    name: {"description": entry["description"], "parameters": entry["parameters"]}
+    for name, entry in TOOL_REGISTRY.items()
+})
+
+
+def get_tool_schemas_json() -> str:
+    """All tools as a JSON array of function-calling schemas, ready to send verbatim."""
+    return _TOOL_SCHEMAS_JSON
@@ -5,8 +5,12 @@ This file demonstrates how to call the agent tools directly in Python.
 For LLM function calling integration, see the TOOL_REGISTRY in tools.py.
 """
 
+import asyncio
+
 from agents.tools import (
     get_patient_context,
+    aget_care_plan_protocols,
+    aget_recent_events,
     get_care_plan_protocols,
     get_recent_events,
     log_symptom_event,
@@ -100,15 +104,20 @@ print(f"Created workflow result: {result.id}, Route: {result.route}")
 # Example 6: Full Triage Flow (As an Agent Would Orchestrate It)
 # ============================================================================
 
-def run_triage_workflow(patient_id: str, symptom_name: str, severity: int):
+async def run_triage_workflow(patient_id: str, symptom_name: str, severity: int):
     """
     Example of how an LLM agent orchestrates the triage workflow.
     NO HARDCODED THRESHOLDS - THE AGENT USES THE PROTOCOLS.
     """
     print(f"\n--- Running Triage Workflow for {symptom_name} ({severity}/10) ---")
 
-    # 1. Get context and protocols for the specific complaint
-    protocols = get_care_plan_protocols(patient_id, chief_complaint=symptom_name)
+    # 1. Get protocols for the specific complaint and recent history
+    # (independent reads, so fetch them concurrently)
+    protocols, recent = await asyncio.gather(
+        aget_care_plan_protocols(patient_id, chief_complaint=symptom_name),
+        aget_recent_events(patient_id, window_hours=72, event_types=["symptom"])
+    )
+    print(f"Recent symptom events (72h): {len(recent)}")
     protocol = protocols[0] if protocols else None
     
     if not protocol:
@@ -165,6 +174,6 @@ def run_triage_workflow(patient_id: str, symptom_name: str, severity: int):
     return workflow_result
 
 if __name__ == "__main__":
-    run_triage_workflow(patient_id, "Headache", 7)
+    asyncio.run(run_triage_workflow(patient_id, "Headache", 7))
 
 
@@ -6,21 +6,27 @@ from free-text descriptions.
 """
 
 import os
-import json
+import re
 import uuid
+import asyncio
+import hashlib
+import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+from cachetools import LRUCache
+from pydantic import BaseModel, TypeAdapter
 
 try:
-    from anthropic import Anthropic
+    from anthropic import AsyncAnthropic
     ANTHROPIC_AVAILABLE = True
 except ImportError:
     ANTHROPIC_AVAILABLE = False
-    Anthropic = None
+    AsyncAnthropic = None
 
 from schemas import (
-    PatientProfile, SymptomEvent, WellnessEvent, TreatmentEvent, LifestyleEvent,
-    EventType, EventSource, MeasurableDisease, CurrentTreatment, SmokingHistory,
+    PatientProfile, Event, EventType, EventSource, MeasurableDisease, CurrentTreatment, SmokingHistory,
     SymptomMeasurement, Severity, LifestyleCategory
 )
 
@@ -32,59 +38,74 @@ except ImportError:
     # python-dotenv not installed, skip .env loading
     pass
 
-# Initialize Anthropic client (only if available)
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-client = None
-if ANTHROPIC_AVAILABLE and ANTHROPIC_API_KEY:
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
+logger = logging.getLogger(__name__)
 
+# Generation calls are long (several seconds of output), so they're async: one
+# worker can run many at once, capped by LLM_MAX_CONCURRENCY
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+_llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
 
-def generate_patient_profile_and_events(
-    description: str,
-    name: Optional[str] = None,
-    months_of_history: int = 6
-) -> Tuple[PatientProfile, List]:
-    """
-    Generate a PatientProfile and realistic event history from a text description.
+_client = None
+
+# Profile generation invents a consistent clinical story; event parsing is
+# plain NL-to-JSON extraction, which the fast model handles at a fraction of
+# the latency
+PROFILE_MODEL = "claude-sonnet-4-20250514"
+EVENTS_MODEL = "claude-haiku-4-5"
+EVENTS_MAX_TOKENS = 4096
+
+
+class ProfileAndEventsResponse(BaseModel):
+    """Shape of the profile generation response.
     
-    Args:
-        description: Free-text description of the patient (diagnosis, stage, symptoms, etc.)
-        name: Optional patient name (if not provided, will be generated)
-        months_of_history: How many months of historical events to generate
-        
-    Returns:
-        Tuple of (PatientProfile, List[BaseEvent])
+    Events stay raw dicts here; they're normalized (IDs, source, legacy
+    symptom format) before being built into event models.
     """
-    global client
-    
-    if not ANTHROPIC_AVAILABLE:
-        raise ValueError("Anthropic package not installed. Install with: pip install anthropic")
-    
-    if client is None:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable is required. Set it in a .env file or export it.")
-        client = Anthropic(api_key=api_key)
-    
-    # Generate a unique patient ID
-    patient_id = str(uuid.uuid4())
-    
-    # Calculate date range for events
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=months_of_history * 30)
-    
-    # Build the prompt
-    prompt = f"""You are a medical data generator for an oncology remote patient monitoring system.
+    profile: PatientProfile
+    events: List[Dict[str, Any]] = []
+
+
+# Built once. Claude returns the profile as the input of a forced emit_profile
+# tool call, so the SDK hands it over already parsed and constrained to this
+# schema: no markdown fences to strip and no JSON decode step
+_PROFILE_ADAPTER = TypeAdapter(ProfileAndEventsResponse)
+PROFILE_TOOL = {
+    "name": "emit_profile",
+    "description": "Record the generated patient profile and its clinical event history.",
+    "input_schema": _PROFILE_ADAPTER.json_schema(),
+}
+
+# Event lists are validated in one pass through the tagged union; types outside
+# it are dropped beforehand, as the old if/elif dispatch did
+_EVENTS_ADAPTER = TypeAdapter(List[Event])
+_EVENT_ADAPTER = TypeAdapter(Event)
+_GENERATED_EVENT_TYPES = frozenset(
+    t.value for t in (EventType.SYMPTOM, EventType.WELLNESS, EventType.TREATMENT, EventType.LIFESTYLE)
+)
+
+# Generated profiles keyed by (description digest, months, name, model): demo
+# runs reuse the same descriptions, and a hit skips a multi-second Claude
+# call. Hits are handed out as copies with fresh IDs so every caller still
+# gets a distinct patient.
+PROFILE_CACHE_SIZE = 256
+_profile_cache: LRUCache = LRUCache(maxsize=PROFILE_CACHE_SIZE)
 
-Given this patient description:
-"{description}"
 
-Generate a realistic patient profile and {months_of_history} months of clinical event history.
+# ============================================================================
+# Prompt Templates
+# ============================================================================
+# The static instructions and schemas go first in their own cache_control
+# block so Anthropic can serve them from its prompt cache; only the short
+# request part (filled with str.format_map) changes between calls.
 
-Return ONLY valid JSON in this exact structure:
-{{
-  "profile": {{
-    "id": "{patient_id}",
+PROFILE_STATIC_PROMPT = """You are a medical data generator for an oncology remote patient monitoring system.
+
+Given the patient description at the end of this message, generate a realistic patient profile and clinical event history covering the history window given there.
+
+Call the emit_profile tool with input in this exact structure:
+{
+  "profile": {
+    "id": "<patient ID given below>",
     "name": "<patient name>",
     "age": <integer 30-90>,
     "gender": "<Male|Female|Other>",
@@ -97,49 +118,49 @@ Return ONLY valid JSON in this exact structure:
     "diagnosis_date": "<YYYY-MM-DD>",
     "first_occurrence": <true|false>,
     "stage": "<e.g., IIB, IIIA, IV>",
-    "measurable_disease": {{
+    "measurable_disease": {
       "is_measurable": <true|false>,
       "description": "<if measurable, describe>"
-    }},
+    },
     "tumor_markers_found": ["<marker1>", "<marker2>"],
     "tumor_markers_ruled_out": ["<marker1>"],
     "family_history": "<text description>",
     "prior_therapies": [
-      {{
+      {
         "regimen": "<treatment name>",
         "start_date": "<YYYY-MM-DD>",
         "end_date": "<YYYY-MM-DD>"
-      }}
+      }
     ],
-    "current_treatment": {{
+    "current_treatment": {
       "is_active": <true|false>,
       "regimen": "<current regimen if active>"
-    }},
+    },
     "ecog_score": <0-4>,
-    "smoking_history": {{
+    "smoking_history": {
       "pack_years": <float>,
       "quit_date": "<YYYY-MM-DD or null>"
-    }},
+    },
     "alcohol_consumption": "<description>",
     "concerns": "<patient concerns>",
     "prognosis_preference": "<show_stats|avoid_stats|neutral>",
     "medical_records_text": "<summary text>"
-  }},
+  },
   "events": [
-    {{
+    {
       "event_type": "symptom|wellness|treatment",
       "timestamp": "<ISO-8601 datetime>",
       "source": "manual",
-      "patient_id": "{patient_id}",
+      "patient_id": "<patient ID given below>",
       "id": "<uuid>",
       // For symptom events:
       "measurements": [
-        {{
+        {
           "name": "<symptom name>",
-          "severity": {{"value": <0-10>, "scale": "0_10"}},
+          "severity": {"value": <0-10>, "scale": "0_10"},
           "trend": "<worsening|improving|stable>",
           "rawAnswer": "<optional>"
-        }}
+        }
       ],
       // For wellness events:
       "mood": <1-5>,
@@ -151,155 +172,48 @@ Return ONLY valid JSON in this exact structure:
       // For interval treatments (treatment courses):
       "start_timestamp": "<ISO-8601 or null>",
       "end_timestamp": "<ISO-8601 or null>"
-    }}
+    }
   ]
-}}
+}
 
 Requirements:
 1. Make the profile medically realistic and consistent with the description
-2. Generate events from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}
+2. Generate events across the history window given below
 3. For treatments: create both point-in-time events (single infusions) and interval events (treatment courses with start/end dates)
 4. Symptom events should correlate temporally with treatments (e.g., nausea/fatigue after chemo)
 5. Include wellness check-ins roughly weekly
 6. Treatment intervals should be realistic (e.g., 2-3 week cycles, 3-6 month courses)
 7. All timestamps must be ISO-8601 format
-8. Generate at least 10-20 events total across the {months_of_history} month period
-9. Make symptom severity values realistic (typically 2-7 for ongoing symptoms, spikes up to 8-9 after treatments)
-
-Return ONLY the JSON, no markdown formatting, no code blocks."""
-
-    try:
-        # Call Anthropic API
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=8000,
-            messages=[
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
-        )
-        
-        # Extract JSON from response
-        response_text = message.content[0].text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1]) if lines[-1].startswith("```") else "\n".join(lines[1:])
-        
-        # Parse JSON
-        data = json.loads(response_text)
-        
-        # Validate and create PatientProfile
-        profile_data = data["profile"]
-        if name:
-            profile_data["name"] = name
-        
-        profile = PatientProfile(**profile_data)
-        
-        # Validate and create events
-        events = []
-        for event_data in data["events"]:
-            event_type = event_data.get("event_type")
-            
-            # Ensure required fields
-            if "id" not in event_data:
-                event_data["id"] = str(uuid.uuid4())
-            event_data["patient_id"] = patient_id
-            event_data["source"] = EventSource.MANUAL
-            event_data["confidence"] = 1.0
-            event_data["derived_from"] = []
-            event_data["schema_version"] = "1.0"
-            
-            if event_type == "symptom":
-                # Ensure measurements structure
-                if "measurements" not in event_data:
-                    # Convert legacy format if needed
-                    if "symptom_name" in event_data:
-                        event_data["measurements"] = [{
-                            "name": event_data["symptom_name"],
-                            "severity": {"value": event_data.get("severity"), "scale": "0_10"},
-                            "trend": event_data.get("trend", "stable")
-                        }]
-                event = SymptomEvent(**event_data)
-            elif event_type == "wellness":
-                event = WellnessEvent(**event_data)
-            elif event_type == "treatment":
-                event = TreatmentEvent(**event_data)
-            else:
-                # Skip unknown event types
-                continue
-            
-            events.append(event)
-        
-        return profile, events
-        
-    except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to parse LLM response as JSON: {e}")
-    except Exception as e:
-        raise ValueError(f"Error generating patient profile: {e}")
+8. Generate at least 10-20 events total across the history window
+9. Make symptom severity values realistic (typically 2-7 for ongoing symptoms, spikes up to 8-9 after treatments)"""
 
+PROFILE_REQUEST_TEMPLATE = """Patient ID: {patient_id}
+History window: {start_date} to {end_date} ({months_of_history} months)
 
-def generate_events_from_prompt(
-    patient_id: str,
-    prompt: str
-) -> List:
-    """
-    Generate events from a natural language prompt.
-    
-    This allows users to describe multiple events in plain language and have them
-    parsed into structured event objects.
-    
-    Args:
-        patient_id: The patient ID to associate events with
-        prompt: Natural language description of events (e.g., "Last week I had headaches 
-                on Monday and Wednesday, started a new diet on Tuesday...")
-        
-    Returns:
-        List of event objects (SymptomEvent, WellnessEvent, TreatmentEvent, LifestyleEvent)
-    """
-    global client
-    
-    if not ANTHROPIC_AVAILABLE:
-        raise ValueError("Anthropic package not installed. Install with: pip install anthropic")
-    
-    if client is None:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable is required. Set it in a .env file or export it.")
-        client = Anthropic(api_key=api_key)
-    
-    # Get current date for context
-    today = datetime.now()
-    
-    # Build the prompt
-    llm_prompt = f"""You are a medical data parser for a patient health tracking system.
-
-Today's date is: {today.strftime('%Y-%m-%d')}
+Patient description:
+"{description}\""""
 
-Parse the following natural language description into structured health events.
-The patient is describing their recent health experiences:
+EVENTS_STATIC_PROMPT = """You are a medical data parser for a patient health tracking system.
 
-"{prompt}"
+Parse the natural language description at the end of this message into structured health events.
+The patient is describing their recent health experiences.
 
 Return ONLY valid JSON with an array of events in this exact structure:
-{{
+{
   "events": [
-    {{
+    {
       "event_type": "symptom|wellness|treatment|lifestyle",
       "timestamp": "<ISO-8601 datetime>",
       "id": "<uuid>",
       
       // For symptom events:
       "measurements": [
-        {{
+        {
           "name": "<symptom name>",
-          "severity": {{"value": <0-10>, "scale": "0_10"}},
+          "severity": {"value": <0-10>, "scale": "0_10"},
           "trend": "<worsening|improving|stable>",
           "rawAnswer": "<optional - original description>"
-        }}
+        }
       ],
       
       // For wellness events:
@@ -316,12 +230,12 @@ Return ONLY valid JSON with an array of events in this exact structure:
       "category": "<diet|exercise|sleep|stress|travel|other>",
       "description": "<optional>",
       "notes": "<optional>"
-    }}
+    }
   ]
-}}
+}
 
 Guidelines:
-1. Parse dates relative to today ({today.strftime('%Y-%m-%d')}). "Last Monday" means the most recent Monday before today.
+1. Parse dates relative to today's date (given below). "Last Monday" means the most recent Monday before today.
 2. "Yesterday", "today", "last week", etc. should be converted to specific ISO-8601 dates.
 3. For symptoms without explicit severity, estimate based on descriptive language (mild=2-3, moderate=4-6, severe=7-9).
 4. Categorize events appropriately:
@@ -335,70 +249,341 @@ Guidelines:
 
 Return ONLY the JSON, no markdown formatting, no code blocks."""
 
+EVENTS_REQUEST_TEMPLATE = """Today's date is: {today}
+
+Description:
+"{prompt}\""""
+
+
+def _prompt_content(static_prompt: str, request_text: str) -> List[Dict]:
+    """User message content: the cacheable static prefix, then the per-call request."""
+    return [
+        {"type": "text", "text": static_prompt, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": request_text}
+    ]
+
+
+def _log_usage(label: str, usage) -> None:
+    logger.debug(
+        "%s input=%s cache_read=%s cache_write=%s output=%s",
+        label, usage.input_tokens, usage.cache_read_input_tokens,
+        usage.cache_creation_input_tokens, usage.output_tokens
+    )
+
+
+def get_client():
+    """Get or create the shared async Anthropic client."""
+    global _client
+    
+    if not ANTHROPIC_AVAILABLE:
+        raise ValueError("Anthropic package not installed. Install with: pip install anthropic")
+    
+    if _client is None:
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY environment variable is required. Set it in a .env file or export it.")
+        _client = AsyncAnthropic(api_key=api_key)
+    return _client
+
+
+async def _create_message(**kwargs):
+    """messages.create under the shared concurrency cap."""
+    async with _llm_semaphore:
+        return await get_client().messages.create(**kwargs)
+
+
+async def generate_patient_profile_and_events(
+    description: str,
+    name: Optional[str] = None,
+    months_of_history: int = 6,
+    model: str = PROFILE_MODEL
+) -> Tuple[PatientProfile, List]:
+    """
+    Generate a PatientProfile and realistic event history from a text description.
+    
+    Args:
+        description: Free-text description of the patient (diagnosis, stage, symptoms, etc.)
+        name: Optional patient name (if not provided, will be generated)
+        months_of_history: How many months of historical events to generate
+        model: Claude model to generate with
+        
+    Returns:
+        Tuple of (PatientProfile, List[BaseEvent])
+    """
+    cache_key = (
+        hashlib.blake2b(description.encode(), digest_size=16).digest(),
+        months_of_history, name, model
+    )
+    cached = _profile_cache.get(cache_key)
+    if cached is not None:
+        return _with_fresh_ids(*cached)
+    
+    get_client()  # fail fast on missing package / API key
+    
+    # Generate a unique patient ID
+    patient_id = str(uuid.uuid4())
+    
+    # Calculate date range for events
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=months_of_history * 30)
+    
+    # Build the prompt
+    request_text = PROFILE_REQUEST_TEMPLATE.format_map({
+        "description": description,
+        "months_of_history": months_of_history,
+        "patient_id": patient_id,
+        "start_date": start_date.strftime('%Y-%m-%d'),
+        "end_date": end_date.strftime('%Y-%m-%d'),
+    })
+
     try:
         # Call Anthropic API
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=4000,
+        message = await _create_message(
+            model=model,
+            max_tokens=8000,
+            tools=[PROFILE_TOOL],
+            tool_choice={"type": "tool", "name": PROFILE_TOOL["name"]},
             messages=[
                 {
                     "role": "user",
-                    "content": llm_prompt
+                    "content": _prompt_content(PROFILE_STATIC_PROMPT, request_text)
                 }
             ]
         )
+        _log_usage("profile generation", message.usage)
         
-        # Extract JSON from response
-        response_text = message.content[0].text.strip()
+        # The forced tool call carries the profile as already-parsed input
+        tool_input = next(block.input for block in message.content if block.type == "tool_use")
+        data = _PROFILE_ADAPTER.validate_python(tool_input)
         
-        # Remove markdown code blocks if present
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1]) if lines[-1].startswith("```") else "\n".join(lines[1:])
-        
-        # Parse JSON
-        data = json.loads(response_text)
+        profile = data.profile
+        profile.id = patient_id  # the ID is only given in the request block
+        if name:
+            profile.name = name
         
         # Validate and create events
-        events = []
-        for event_data in data["events"]:
-            event_type = event_data.get("event_type")
-            
-            # Ensure required fields
-            if "id" not in event_data:
-                event_data["id"] = str(uuid.uuid4())
-            event_data["patient_id"] = patient_id
-            event_data["source"] = EventSource.MANUAL
-            event_data["confidence"] = 0.9  # Slightly lower confidence for LLM-parsed events
-            event_data["derived_from"] = []
-            event_data["schema_version"] = "1.0"
-            
-            if event_type == "symptom":
-                # Ensure measurements structure
-                if "measurements" not in event_data:
-                    if "symptom_name" in event_data:
-                        event_data["measurements"] = [{
-                            "name": event_data["symptom_name"],
-                            "severity": {"value": event_data.get("severity"), "scale": "0_10"},
-                            "trend": event_data.get("trend", "stable")
-                        }]
-                event = SymptomEvent(**event_data)
-            elif event_type == "wellness":
-                event = WellnessEvent(**event_data)
-            elif event_type == "treatment":
-                event = TreatmentEvent(**event_data)
-            elif event_type == "lifestyle":
-                event = LifestyleEvent(**event_data)
-            else:
-                # Skip unknown event types
-                continue
-            
-            events.append(event)
+        events = _EVENTS_ADAPTER.validate_python([
+            _normalize_event(event_data, patient_id, confidence=1.0)
+            for event_data in data.events
+            if event_data.get("event_type") in _GENERATED_EVENT_TYPES
+        ])
+        
+        _profile_cache[cache_key] = (
+            profile.model_copy(deep=True), [event.model_copy(deep=True) for event in events]
+        )
+        return profile, events
+        
+    except StopIteration:
+        raise ValueError("Error generating patient profile: Claude did not call emit_profile")
+    except Exception as e:
+        raise ValueError(f"Error generating patient profile: {e}")
+
+
+async def generate_events_from_prompt(
+    patient_id: str,
+    prompt: str,
+    model: str = EVENTS_MODEL
+) -> List:
+    """
+    Generate events from a natural language prompt.
+    
+    This allows users to describe multiple events in plain language and have them
+    parsed into structured event objects.
+    
+    Args:
+        patient_id: The patient ID to associate events with
+        prompt: Natural language description of events (e.g., "Last week I had headaches 
+                on Monday and Wednesday, started a new diet on Tuesday...")
+        model: Claude model to parse with
         
-        return events
+    Returns:
+        List of event objects (SymptomEvent, WellnessEvent, TreatmentEvent, LifestyleEvent)
+    """
+    return [event async for event in stream_events_from_prompt(patient_id, prompt, model)]
+
+
+async def stream_events_from_prompt(
+    patient_id: str,
+    prompt: str,
+    model: str = EVENTS_MODEL
+) -> AsyncIterator:
+    """
+    Streaming variant of generate_events_from_prompt: each event is yielded as
+    soon as its JSON object is complete in Claude's output, instead of after
+    the whole response has been generated.
+    """
+    get_client()  # fail fast on missing package / API key
+    
+    llm_content = _events_prompt(prompt)
+    
+    try:
+        scanner = _EventArrayScanner()
+        fragments = []
+        emitted = 0
         
-    except json.JSONDecodeError as e:
+        # Call Anthropic API
+        async with _llm_semaphore:
+            async with get_client().messages.stream(
+                model=model,
+                max_tokens=EVENTS_MAX_TOKENS,
+                temperature=0.0,  # extraction, not creative writing
+                messages=[
+                    {
+                        "role": "user",
+                        "content": llm_content
+                    }
+                ]
+            ) as stream:
+                async for fragment in stream.text_stream:
+                    fragments.append(fragment)
+                    for event_data in scanner.feed(fragment):
+                        emitted += 1
+                        event = _build_prompt_event(event_data, patient_id)
+                        if event is not None:
+                            yield event
+                _log_usage("event generation", (await stream.get_final_message()).usage)
+        
+        # Nothing came through incrementally (unexpected shape): parse the
+        # full response the old way
+        if emitted == 0:
+            data = orjson.loads(_strip_code_fence("".join(fragments)))
+            for event_data in data["events"]:
+                event = _build_prompt_event(event_data, patient_id)
+                if event is not None:
+                    yield event
+        
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Failed to parse LLM response as JSON: {e}")
     except Exception as e:
         raise ValueError(f"Error generating events from prompt: {e}")
 
+
+def _events_prompt(prompt: str) -> List[Dict]:
+    """Message content asking Claude to parse a free-text description into events."""
+    # Get current date for context
+    today = datetime.now()
+    
+    request_text = EVENTS_REQUEST_TEMPLATE.format_map({
+        "today": today.strftime('%Y-%m-%d'),
+        "prompt": prompt,
+    })
+    return _prompt_content(EVENTS_STATIC_PROMPT, request_text)
+
+
+def _with_fresh_ids(profile: PatientProfile, events: List) -> Tuple[PatientProfile, List]:
+    """Copy of a cached profile and its events under a new patient ID."""
+    patient_id = str(uuid.uuid4())
+    return (
+        profile.model_copy(deep=True, update={"id": patient_id}),
+        [
+            event.model_copy(deep=True, update={"id": str(uuid.uuid4()), "patient_id": patient_id})
+            for event in events
+        ]
+    )
+
+
+def _normalize_event(event_data: Dict, patient_id: str, confidence: float) -> Dict:
+    """Fill in the bookkeeping fields Claude doesn't produce before validation."""
+    # Ensure required fields
+    if "id" not in event_data:
+        event_data["id"] = str(uuid.uuid4())
+    event_data["patient_id"] = patient_id
+    event_data["source"] = EventSource.MANUAL
+    event_data["confidence"] = confidence
+    event_data["derived_from"] = []
+    event_data["schema_version"] = "1.0"
+    
+    # Convert the legacy flat symptom format to the measurements structure
+    if event_data.get("event_type") == "symptom" and "measurements" not in event_data:
+        if "symptom_name" in event_data:
+            event_data["measurements"] = [{
+                "name": event_data["symptom_name"],
+                "severity": {"value": event_data.get("severity"), "scale": "0_10"},
+                "trend": event_data.get("trend", "stable")
+            }]
+    return event_data
+
+
+def _build_prompt_event(event_data: Dict, patient_id: str):
+    """Typed event for one parsed event dict, or None for unknown event types."""
+    if event_data.get("event_type") not in _GENERATED_EVENT_TYPES:
+        return None
+    # Slightly lower confidence for LLM-parsed events
+    return _EVENT_ADAPTER.validate_python(_normalize_event(event_data, patient_id, confidence=0.9))
+
+
+def _strip_code_fence(response_text: str) -> str:
+    """Remove markdown code blocks if present."""
+    response_text = response_text.strip()
+    if response_text.startswith("```"):
+        # Slice between the opening fence line and the closing fence rather
+        # than splitting the whole response into lines and re-joining it
+        nl = response_text.find("\n")
+        if nl == -1:
+            return ""
+        end = len(response_text) - 3
+        response_text = response_text[nl + 1:end if response_text.endswith("```") and end > nl else None]
+    return response_text
+
+
+class _EventArrayScanner:
+    """
+    Pulls complete objects out of a streamed {"events": [...]} document as soon
+    as each one closes, tracking brace depth and string state across fragments.
+    """
+    
+    _ARRAY_START = re.compile(r'"events"\s*:\s*\[')
+    
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = 0
+    
+    def feed(self, fragment: str) -> List[Dict]:
+        """Add a text fragment; returns the event dicts it completed."""
+        self._buffer += fragment
+        if self._done:
+            return []
+        if not self._in_array:
+            match = self._ARRAY_START.search(self._buffer)
+            if match is None:
+                return []
+            self._in_array = True
+            self._pos = match.end()
+        
+        completed = []
+        buffer = self._buffer
+        i = self._pos
+        while i < len(buffer):
+            c = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c == "{":
+                if self._depth == 0:
+                    self._start = i
+                self._depth += 1
+            elif c == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        completed.append(orjson.loads(buffer[self._start:i + 1]))
+                    except ValueError:
+                        pass  # malformed object; skip it
+            elif c == "]" and self._depth == 0:
+                self._done = True
+                break
+            i += 1
+        self._pos = i
+        return completed
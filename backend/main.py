@@ -1,7 +1,11 @@
 from fastapi import FastAPI, HTTPException, Body
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
+import os
+import asyncio
 import inspect
+import orjson
 
 # Load environment variables from .env file
 load_dotenv()
@@ -12,21 +16,44 @@ from schemas import (
 )
 from pydantic import BaseModel
 from store import store
-from agents.chat_orchestrator import process_chat_message, ChatState
-from llm.profile_generator import generate_patient_profile_and_events, generate_events_from_prompt
-from agents.tools import TOOL_REGISTRY
+from agents.chat_orchestrator import (
+    process_chat_message,
+    run_chat_turn,
+    ChatState as OrchestratorChatState,
+    ChatTurnResponse,
+    LANGGRAPH_AVAILABLE
+)
+from llm.profile_generator import (
+    generate_patient_profile_and_events,
+    generate_events_from_prompt,
+    stream_events_from_prompt
+)
+from agents.tools import (
+    TOOL_REGISTRY,
+    TOOL_DEFINITIONS_JSON,
+    TOOL_INPUT_ADAPTERS,
+    invalidate_patient_context,
+    start_event_writer,
+    stop_event_writer,
+    aclose_http_clients
+)
 from agents.elevenlabs_agent import (
-    compute_checkin_questions,
-    PrecomputedQuestions
+    get_agent_manager,
+    get_precomputed_questions,
+    start_precompute_scheduler,
+    PrecomputedQuestions,
+    SessionStartResult
 )
 from agents.checkin_agent import (
     get_checkin_agent,
+    invalidate_patient_prompt_cache,
     CheckinRequest,
     CheckinResponse,
     CheckinState
 )
 from agents.react_agent import (
     get_agent as get_react_agent,
+    invalidate_chat_prompt_cache,
     ChatRequest,
     ChatResponse,
     ChatState,
@@ -37,47 +64,87 @@ from typing import List, Union, Optional, Dict, Any
 
 
 
-app = FastAPI(title="Oncology RPM Console API")
+# orjson for every response body instead of the stdlib json encoder
+app = FastAPI(title="Oncology RPM Console API", default_response_class=ORJSONResponse)
 
-# Configure CORS
+# Configure CORS: ALLOWED_ORIGINS (comma-separated) pins the allowed origins;
+# unset, every origin is allowed for dev. Credentials are only allowed with
+# explicit origins, browsers reject them alongside a wildcard
+ALLOWED_ORIGINS = tuple(
+    origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "").split(",") if origin.strip()
+)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"], # Allow all for dev
-    allow_credentials=True,
+    allow_origins=ALLOWED_ORIGINS or ("*",),
+    allow_credentials=bool(ALLOWED_ORIGINS),
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+_precompute_scheduler = None
+
+@app.on_event("startup")
+def schedule_question_precompute():
+    """Warm per-patient check-in questions nightly (no-op without apscheduler)."""
+    global _precompute_scheduler
+    _precompute_scheduler = start_precompute_scheduler()
+
+@app.on_event("shutdown")
+def stop_question_precompute():
+    if _precompute_scheduler is not None:
+        _precompute_scheduler.shutdown(wait=False)
+
+@app.on_event("startup")
+async def start_queued_event_writer():
+    """Batch event writes queued by the chat agent."""
+    start_event_writer()
+
+@app.on_event("shutdown")
+async def flush_queued_events():
+    await stop_event_writer()
+
+@app.on_event("shutdown")
+async def close_http_clients():
+    await aclose_http_clients()
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Oncology RPM Console API is running"}
 
+def invalidate_patient_caches(patient_id: str):
+    """Drop cached patient context and check-in prompts after a profile change."""
+    invalidate_patient_context(patient_id)
+    invalidate_patient_prompt_cache(patient_id)
+    invalidate_chat_prompt_cache(patient_id)
+
 @app.post("/profile", response_model=PatientProfile)
-def create_or_update_profile(profile: PatientProfile):
-    saved_profile = store.save_profile(profile)
+async def create_or_update_profile(profile: PatientProfile):
+    saved_profile = await asyncio.to_thread(store.save_profile, profile)
+    invalidate_patient_caches(profile.id)
     return saved_profile
 
 @app.get("/profiles", response_model=List[PatientProfile])
-def list_profiles():
+async def list_profiles():
     return store.list_profiles()
 
 @app.post("/profile/switch/{profile_id}", response_model=PatientProfile)
-def switch_profile(profile_id: str):
-    profile = store.switch_profile(profile_id)
+async def switch_profile(profile_id: str):
+    profile = await asyncio.to_thread(store.switch_profile, profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
     return profile
 
 @app.delete("/profile/{profile_id}")
-def delete_profile(profile_id: str):
-    success = store.delete_profile(profile_id)
+async def delete_profile(profile_id: str):
+    success = await asyncio.to_thread(store.delete_profile, profile_id)
     if not success:
         raise HTTPException(status_code=404, detail="Profile not found")
+    invalidate_patient_caches(profile_id)
     return {"message": "Profile deleted successfully"}
 
 @app.post("/profile/new", response_model=PatientProfile)
-def create_new_profile(name: str = Body(..., embed=True)):
-    return store.create_new_profile(name)
+async def create_new_profile(name: str = Body(..., embed=True)):
+    return await asyncio.to_thread(store.create_new_profile, name)
 
 class GenerateProfileRequest(BaseModel):
     description: str
@@ -85,18 +152,18 @@ class GenerateProfileRequest(BaseModel):
     months_of_history: int = 6
 
 @app.post("/profile/generate", response_model=PatientProfile)
-def generate_profile_from_description(request: GenerateProfileRequest):
+async def generate_profile_from_description(request: GenerateProfileRequest):
     """
     Generate a patient profile and realistic event history from a free-text description.
     Uses Anthropic Claude to create medically consistent data.
     """
     try:
-        profile, events = generate_patient_profile_and_events(
+        profile, events = await generate_patient_profile_and_events(
             description=request.description,
             name=request.name,
             months_of_history=request.months_of_history
         )
-        created_profile = store.create_profile_with_events(profile, events)
+        created_profile = await asyncio.to_thread(store.create_profile_with_events, profile, events)
         return created_profile
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -104,14 +171,14 @@ def generate_profile_from_description(request: GenerateProfileRequest):
         raise HTTPException(status_code=500, detail=f"Error generating profile: {str(e)}")
 
 @app.get("/profile", response_model=PatientProfile)
-def get_active_profile():
+async def get_active_profile():
     profile = store.get_active_profile()
     if not profile:
         raise HTTPException(status_code=404, detail="No active profile found")
     return profile
 
 @app.get("/profile/{profile_id}", response_model=PatientProfile)
-def get_profile(profile_id: str):
+async def get_profile(profile_id: str):
     profile = store.get_profile(profile_id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profile not found")
@@ -120,109 +187,120 @@ def get_profile(profile_id: str):
 # Agent Endpoints
 
 @app.post("/agent/session", response_model=AgentSession)
-def create_agent_session(
+async def create_agent_session(
     agent_type: str = Body(...),
     transcript: str = Body(...),
     analysis: AgentAnalysis = Body(...)
 ):
-    session = store.create_session(agent_type, transcript, analysis)
+    session = await asyncio.to_thread(store.create_session, agent_type, transcript, analysis)
     return session
 
 @app.get("/agent/sessions", response_model=List[AgentSession])
-def get_agent_sessions():
+async def get_agent_sessions():
     return store.get_sessions()
 
-@app.post("/agent/chat")
-def chat_with_agent(
+@app.post("/agent/chat", response_model=ChatTurnResponse)
+async def chat_with_agent(
     message: str = Body(...),
     agent_type: str = Body(...),
-    state: ChatState = Body(...)
+    state: Optional[OrchestratorChatState] = Body(None),
+    session_id: Optional[str] = Body(None)
 ):
     """
     Endpoint for the Chat Simulator.
     Processes a single turn of conversation using the mock orchestrator.
+    
+    With a session_id (and langgraph installed) the conversation is resumed
+    from its checkpoint, so the client doesn't need to send the state back.
     """
-    return process_chat_message(message, state, agent_type)
+    if session_id and LANGGRAPH_AVAILABLE:
+        return await asyncio.to_thread(run_chat_turn, message, agent_type, session_id)
+    return await asyncio.to_thread(process_chat_message, message, state or OrchestratorChatState(), agent_type)
+
+# The mock analyses never change: validate and serialize them once at import
+# (through AgentAnalysis, so the bytes match what response_model produced)
+# and hand the same bytes back on every call
+def _mock_analysis_json(analysis: dict) -> bytes:
+    return orjson.dumps(AgentAnalysis(**analysis).model_dump(mode="json"))
+
+_MOCK_CHECKIN = _mock_analysis_json({
+    "event_type": "patient_initiated_checkin",
+    "timestamp": "2025-12-04T18:45:00Z",
+    "chief_complaint": "worsening headaches and nausea",
+    "symptom_observations": [
+        {
+            "name": "headache",
+            "severity_0_10": 8,
+            "onset_date": "2025-12-02",
+            "trend": "worsening",
+            "location": "right frontal",
+            "associated_symptoms": ["nausea", "photophobia"],
+            "functional_impact": "cannot work, stays in bed"
+        },
+        {
+            "name": "nausea",
+            "severity_0_10": 6,
+            "onset_relative_to_event": "2 days after last infusion"
+        }
+    ],
+    "possible_relationships": [
+        {
+            "symptom": "nausea",
+            "related_to": "chemo_infusion",
+            "related_event_id": "tx_2025_11_30",
+            "relationship_type": "temporal_association"
+        }
+    ],
+    "safety_flags": {
+        "red_flag_present": False,
+        "recommendation_level": "yellow" 
+    }
+})
+_MOCK_WELLNESS = _mock_analysis_json({
+    "event_type": "wellness_checkin",
+    "timestamp": "2025-12-05T10:00:00Z",
+    "mood": "anxious",
+    "goals": "Walk the dog twice this week",
+    "symptom_observations": [], # Usually empty for wellness unless reported
+    "possible_relationships": [],
+    "safety_flags": {
+         "red_flag_present": False,
+         "recommendation_level": "green" 
+    }
+})
+# Fallback
+_MOCK_FALLBACK = _mock_analysis_json({
+    "event_type": "unknown",
+    "timestamp": "2025-12-05T00:00:00Z",
+    "symptom_observations": [],
+    "possible_relationships": [],
+    "safety_flags": {
+         "red_flag_present": False,
+         "recommendation_level": "green" 
+    }
+})
 
-@app.post("/agent/simulate", response_model=AgentAnalysis)
-def simulate_analysis(agent_type: str = Body(...), transcript: str = Body(...)):
+@app.post("/agent/simulate", responses={200: {"model": AgentAnalysis}})
+async def simulate_analysis(agent_type: str = Body(...), transcript: str = Body(...)):
     """
     MOCK Endpoint: In a real app, this would call an LLM.
     Here we return static/semi-static data based on the prompt.
     """
     
     if agent_type == "patient_initiated_checkin":
-        return {
-            "event_type": "patient_initiated_checkin",
-            "timestamp": "2025-12-04T18:45:00Z",
-            "chief_complaint": "worsening headaches and nausea",
-            "symptom_observations": [
-                {
-                    "name": "headache",
-                    "severity_0_10": 8,
-                    "onset_date": "2025-12-02",
-                    "trend": "worsening",
-                    "location": "right frontal",
-                    "associated_symptoms": ["nausea", "photophobia"],
-                    "functional_impact": "cannot work, stays in bed"
-                },
-                {
-                    "name": "nausea",
-                    "severity_0_10": 6,
-                    "onset_relative_to_event": "2 days after last infusion"
-                }
-            ],
-            "possible_relationships": [
-                {
-                    "symptom": "nausea",
-                    "related_to": "chemo_infusion",
-                    "related_event_id": "tx_2025_11_30",
-                    "relationship_type": "temporal_association"
-                }
-            ],
-            "safety_flags": {
-                "red_flag_present": False,
-                "recommendation_level": "yellow" 
-            }
-        }
+        return Response(content=_MOCK_CHECKIN, media_type="application/json")
     elif agent_type == "wellness_checkin":
-        return {
-            "event_type": "wellness_checkin",
-            "timestamp": "2025-12-05T10:00:00Z",
-            "mood": "anxious",
-            "goals": "Walk the dog twice this week",
-            "symptom_observations": [], # Usually empty for wellness unless reported
-            "possible_relationships": [],
-            "safety_flags": {
-                 "red_flag_present": False,
-                 "recommendation_level": "green" 
-            }
-        }
+        return Response(content=_MOCK_WELLNESS, media_type="application/json")
     else:
-        # Fallback
-        return {
-            "event_type": "unknown",
-            "timestamp": "2025-12-05T00:00:00Z",
-            "symptom_observations": [],
-            "possible_relationships": [],
-             "safety_flags": {
-                 "red_flag_present": False,
-                 "recommendation_level": "green" 
-            }
-        }
+        return Response(content=_MOCK_FALLBACK, media_type="application/json")
 
 # Tool Webhook Endpoints
 
 @app.get("/agent/tools/definitions")
-def get_tool_definitions():
+async def get_tool_definitions():
     """Returns definitions of all available tools for agent discovery."""
-    definitions = {}
-    for name, tool in TOOL_REGISTRY.items():
-        definitions[name] = {
-            "description": tool["description"],
-            "parameters": tool["parameters"]
-        }
-    return definitions
+    # Serialized once at import (the registry is static)
+    return Response(content=TOOL_DEFINITIONS_JSON, media_type="application/json")
 
 import inspect
 
@@ -249,7 +327,8 @@ def execute_tool_webhook(request: ToolCallRequest):
                 # If parameter has a Pydantic model type hint, convert dict to model
                 if hasattr(param.annotation, "__base__") and param.annotation.__base__ == BaseModel:
                     if isinstance(val, dict):
-                        bound_args[name] = param.annotation(**val)
+                        adapter = TOOL_INPUT_ADAPTERS.get(param.annotation)
+                        bound_args[name] = adapter.validate_python(val) if adapter else param.annotation(**val)
                     else:
                         bound_args[name] = val
                 else:
@@ -286,19 +365,19 @@ def execute_tool_webhook(request: ToolCallRequest):
 # Timeline Endpoints
 
 @app.post("/events", response_model=Union[SymptomEvent, WellnessEvent, TreatmentEvent, LifestyleEvent, BaseEvent])
-def create_event(event_data: dict = Body(...)):
+async def create_event(event_data: dict = Body(...)):
     try:
-        return store.add_event(event_data)
+        return await asyncio.to_thread(store.add_event, event_data)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/events/{patient_id}", response_model=List[Union[SymptomEvent, WellnessEvent, TreatmentEvent, LifestyleEvent, BaseEvent]])
-def get_patient_events(patient_id: str):
+async def get_patient_events(patient_id: str):
     return store.get_events(patient_id)
 
 @app.delete("/events/{event_id}")
-def delete_event(event_id: str):
-    success = store.delete_event(event_id)
+async def delete_event(event_id: str):
+    success = await asyncio.to_thread(store.delete_event, event_id)
     if not success:
         raise HTTPException(status_code=404, detail="Event not found")
     return {"message": "Event deleted successfully"}
@@ -306,19 +385,19 @@ def delete_event(event_id: str):
 # Annotation Endpoints
 
 @app.post("/annotations", response_model=Annotation)
-def create_annotation(annotation: Annotation):
+async def create_annotation(annotation: Annotation):
     """Create a new annotation."""
-    return store.add_annotation(annotation)
+    return await asyncio.to_thread(store.add_annotation, annotation)
 
 @app.get("/annotations/{patient_id}", response_model=List[Annotation])
-def get_annotations(patient_id: str):
+async def get_annotations(patient_id: str):
     """Get all annotations for a patient."""
     return store.get_annotations(patient_id)
 
 @app.delete("/annotations/{annotation_id}")
-def delete_annotation(annotation_id: str):
+async def delete_annotation(annotation_id: str):
     """Delete an annotation."""
-    success = store.delete_annotation(annotation_id)
+    success = await asyncio.to_thread(store.delete_annotation, annotation_id)
     if not success:
         raise HTTPException(status_code=404, detail="Annotation not found")
     return {"message": "Annotation deleted successfully"}
@@ -326,19 +405,19 @@ def delete_annotation(annotation_id: str):
 # Saved View Endpoints
 
 @app.post("/views", response_model=SavedView)
-def create_saved_view(view: SavedView):
+async def create_saved_view(view: SavedView):
     """Create a new saved view."""
-    return store.add_saved_view(view)
+    return await asyncio.to_thread(store.add_saved_view, view)
 
 @app.get("/views/{patient_id}", response_model=List[SavedView])
-def get_saved_views(patient_id: str):
+async def get_saved_views(patient_id: str):
     """Get all saved views for a patient."""
     return store.get_saved_views(patient_id)
 
 @app.delete("/views/{view_id}")
-def delete_saved_view(view_id: str):
+async def delete_saved_view(view_id: str):
     """Delete a saved view."""
-    success = store.delete_saved_view(view_id)
+    success = await asyncio.to_thread(store.delete_saved_view, view_id)
     if not success:
         raise HTTPException(status_code=404, detail="Saved view not found")
     return {"message": "Saved view deleted successfully"}
@@ -350,7 +429,7 @@ class BulkEventRequest(BaseModel):
     prompt: str
 
 @app.post("/events/bulk-create")
-def create_bulk_events(request: BulkEventRequest):
+async def create_bulk_events(request: BulkEventRequest):
     """
     Create multiple events from a natural language prompt.
     Uses Claude to parse the description and generate structured events.
@@ -360,16 +439,13 @@ def create_bulk_events(request: BulkEventRequest):
     """
     try:
         # Generate events from the prompt using LLM
-        events = generate_events_from_prompt(
+        events = await generate_events_from_prompt(
             patient_id=request.patient_id,
             prompt=request.prompt
         )
         
-        # Save all generated events to the store
-        saved_events = []
-        for event in events:
-            saved_event = store.add_event(event.dict())
-            saved_events.append(saved_event)
+        # Save all generated events to the store (one write, off the event loop)
+        saved_events = await asyncio.to_thread(store.add_events, [event.dict() for event in events])
         
         return {
             "message": f"Successfully created {len(saved_events)} events",
@@ -381,6 +457,35 @@ def create_bulk_events(request: BulkEventRequest):
         raise HTTPException(status_code=500, detail=f"Error creating events: {str(e)}")
 
 
+@app.post("/events/bulk-create/stream")
+async def stream_bulk_events(request: BulkEventRequest):
+    """
+    Streaming variant of /events/bulk-create.
+    
+    Returns Server-Sent Events as Claude parses the prompt, saving each event
+    as soon as it is complete:
+    - {"type": "event", "event": {...}} for each saved event
+    - {"type": "done", "count": n} once parsing finishes
+    - {"type": "error", "detail": ...} if generation fails part-way
+    """
+    async def event_stream():
+        count = 0
+        try:
+            async for event in stream_events_from_prompt(
+                patient_id=request.patient_id,
+                prompt=request.prompt
+            ):
+                saved_event = await asyncio.to_thread(store.add_event, event.dict())
+                count += 1
+                yield b"data: " + orjson.dumps({"type": "event", "event": saved_event.dict()}) + b"\n\n"
+        except Exception as e:
+            yield b"data: " + orjson.dumps({"type": "error", "detail": str(e)}) + b"\n\n"
+            return
+        yield b"data: " + orjson.dumps({"type": "done", "count": count}) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 # ============================================================================
 # Voice Check-In Endpoints
 # ============================================================================
@@ -391,7 +496,7 @@ class PrecomputeQuestionsRequest(BaseModel):
 
 
 @app.post("/voice/precompute-questions", response_model=PrecomputedQuestions)
-def precompute_questions(request: PrecomputeQuestionsRequest):
+async def precompute_questions(request: PrecomputeQuestionsRequest):
     """
     Preview the precomputed check-in questions for a patient.
     
@@ -415,7 +520,8 @@ def precompute_questions(request: PrecomputeQuestionsRequest):
         if not profile:
             raise HTTPException(status_code=404, detail=f"Patient not found: {request.patient_id}")
         
-        result = compute_checkin_questions(
+        result = await asyncio.to_thread(
+            get_precomputed_questions,
             patient_id=request.patient_id,
             window_hours=request.window_hours
         )
@@ -425,6 +531,38 @@ def precompute_questions(request: PrecomputeQuestionsRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error computing questions: {str(e)}")
 
+class VoiceSessionRequest(BaseModel):
+    patient_id: str
+    window_hours: int = 84
+
+
+@app.post("/voice/session", response_model=SessionStartResult)
+async def start_voice_session(request: VoiceSessionRequest):
+    """
+    Start an ElevenLabs widget session for a patient.
+    
+    Questions are precomputed (and the profile checked) concurrently, then the
+    agent prompt update and signed-URL fetch overlap in aget_signed_url.
+    """
+    try:
+        profile, precomputed = await asyncio.gather(
+            asyncio.to_thread(store.get_profile, request.patient_id),
+            asyncio.to_thread(get_precomputed_questions, request.patient_id, request.window_hours)
+        )
+        if not profile:
+            raise HTTPException(status_code=404, detail=f"Patient not found: {request.patient_id}")
+        
+        questions = list(precomputed.questions)
+        questions.extend(_custom_questions.get(request.patient_id, []))
+        
+        return await get_agent_manager().aget_signed_url(request.patient_id, questions)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting voice session: {str(e)}")
+
 # In-memory storage for custom questions per patient
 _custom_questions: Dict[str, List[str]] = {}
 
@@ -438,7 +576,7 @@ class BrainStartRequest(BaseModel):
 class BrainStartResponse(BaseModel):
     """Response from starting a check-in conversation."""
     text: str
-    state: Dict[str, Any]
+    state: CheckinState
     questions: List[str]
 
 
@@ -451,9 +589,10 @@ class BrainMessageRequest(BaseModel):
 class BrainMessageResponse(BaseModel):
     """Response from the brain."""
     text: str
-    state: Dict[str, Any]
+    state: CheckinState
     tool_calls_made: List[str]
     is_complete: bool
+    messages_delta: List[Dict[str, Any]] = []
 
 
 class AddQuestionRequest(BaseModel):
@@ -469,7 +608,7 @@ class CustomQuestionsResponse(BaseModel):
 
 
 @app.post("/voice/brain/start", response_model=BrainStartResponse)
-def start_brain_conversation(request: BrainStartRequest):
+async def start_brain_conversation(request: BrainStartRequest):
     """
     Start a new health check-in conversation.
     
@@ -488,7 +627,8 @@ def start_brain_conversation(request: BrainStartRequest):
     
     try:
         # Precompute questions
-        precomputed = compute_checkin_questions(
+        precomputed = await asyncio.to_thread(
+            get_precomputed_questions,
             patient_id=request.patient_id,
             window_hours=request.window_hours
         )
@@ -500,14 +640,14 @@ def start_brain_conversation(request: BrainStartRequest):
         
         # Start conversation
         agent = get_checkin_agent()
-        response = agent.start_conversation(
+        response = await agent.start_conversation(
             patient_id=request.patient_id,
             questions=all_questions
         )
         
         return BrainStartResponse(
             text=response.text,
-            state=response.state.dict(),
+            state=response.state,
             questions=all_questions
         )
     
@@ -518,7 +658,7 @@ def start_brain_conversation(request: BrainStartRequest):
 
 
 @app.post("/voice/brain", response_model=BrainMessageResponse)
-def process_brain_message(request: BrainMessageRequest):
+async def process_brain_message(request: BrainMessageRequest):
     """
     Process a user message through the LLM brain.
     
@@ -545,13 +685,14 @@ def process_brain_message(request: BrainMessageRequest):
             state=state
         )
         
-        response = agent.process_message(checkin_request)
+        response = await agent.process_message(checkin_request)
         
         return BrainMessageResponse(
             text=response.text,
-            state=response.state.dict(),
+            state=response.state,
             tool_calls_made=response.tool_calls_made,
-            is_complete=response.state.is_complete
+            is_complete=response.state.is_complete,
+            messages_delta=response.messages_delta
         )
     
     except ValueError as e:
@@ -560,8 +701,44 @@ def process_brain_message(request: BrainMessageRequest):
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
 
+@app.post("/voice/brain/stream")
+async def stream_brain_message(request: BrainMessageRequest):
+    """
+    Streaming variant of /voice/brain for low time-to-first-audio.
+    
+    Returns Server-Sent Events so TTS can start speaking on the first
+    text delta instead of waiting for the full response:
+    - {"type": "delta", "text": ...} for each chunk of response text
+    - {"type": "done", "state": ..., "tool_calls_made": [...], "is_complete": ..., "messages_delta": [...]}
+      once the turn finishes
+    """
+    try:
+        state = CheckinState(**request.state)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    agent = get_checkin_agent()
+    checkin_request = CheckinRequest(text=request.text, state=state)
+    
+    async def event_stream():
+        tool_calls_made: List[str] = []
+        async for delta in agent.stream_message(checkin_request, tool_calls_made):
+            yield b"data: " + orjson.dumps({"type": "delta", "text": delta}) + b"\n\n"
+        
+        done = {
+            "type": "done",
+            "state": checkin_request.state.model_dump(),
+            "tool_calls_made": tool_calls_made,
+            "is_complete": checkin_request.state.is_complete,
+            "messages_delta": checkin_request.state.messages[-2:]
+        }
+        yield b"data: " + orjson.dumps(done) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @app.post("/voice/questions/add")
-def add_custom_question(request: AddQuestionRequest):
+async def add_custom_question(request: AddQuestionRequest):
     """
     Add a custom question to a patient's check-in list.
     
@@ -594,7 +771,7 @@ def add_custom_question(request: AddQuestionRequest):
 
 
 @app.get("/voice/questions/{patient_id}", response_model=CustomQuestionsResponse)
-def get_custom_questions(patient_id: str):
+async def get_custom_questions(patient_id: str):
     """
     Get custom questions for a patient.
     
@@ -608,7 +785,7 @@ def get_custom_questions(patient_id: str):
 
 
 @app.delete("/voice/questions/{patient_id}/{index}")
-def delete_custom_question(patient_id: str, index: int):
+async def delete_custom_question(patient_id: str, index: int):
     """
     Delete a custom question by index.
     
@@ -665,7 +842,7 @@ class ChatMessageResponse(BaseModel):
 
 
 @app.post("/chat/start", response_model=ChatStartResponse)
-def start_chat_conversation(request: ChatStartRequest):
+async def start_chat_conversation(request: ChatStartRequest):
     """
     Start a new health chat conversation with the ReAct agent.
     
@@ -684,7 +861,7 @@ def start_chat_conversation(request: ChatStartRequest):
     
     try:
         agent = get_react_agent()
-        response = agent.start_conversation(patient_id=request.patient_id)
+        response = await agent.start_conversation(patient_id=request.patient_id)
         
         return ChatStartResponse(
             text=response.text,
@@ -699,7 +876,7 @@ def start_chat_conversation(request: ChatStartRequest):
 
 
 @app.post("/chat/message", response_model=ChatMessageResponse)
-def send_chat_message(request: ChatMessageRequest):
+async def send_chat_message(request: ChatMessageRequest):
     """
     Process a user message through the ReAct health agent.
     
@@ -726,7 +903,7 @@ def send_chat_message(request: ChatMessageRequest):
             state=state
         )
         
-        response = agent.process_message(chat_request)
+        response = await agent.process_message(chat_request)
         
         return ChatMessageResponse(
             text=response.text,
@@ -739,3 +916,37 @@ def send_chat_message(request: ChatMessageRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
+
+
+@app.post("/chat/message/stream")
+async def stream_chat_message(request: ChatMessageRequest):
+    """
+    Streaming variant of /chat/message.
+    
+    Returns Server-Sent Events as the ReAct loop runs:
+    - {"type": "token", "text": ...} for each text delta from Claude
+    - {"type": "trace", "step": {...}} for each thought/action/observation
+    - {"type": "final", "text": ..., "state": ..., "trace": [...], "tool_calls": [...]}
+      once the turn finishes
+    """
+    try:
+        state = ChatState(**request.state)
+        agent = get_react_agent()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    chat_request = ChatRequest(text=request.text, state=state)
+    
+    async def event_stream():
+        async for event in agent.stream_events(chat_request):
+            if event["type"] == "trace":
+                event = {"type": "trace", "step": event["step"].model_dump()}
+            elif event["type"] == "final":
+                event = {
+                    **event,
+                    "state": event["state"].model_dump(),
+                    "trace": [step.model_dump() for step in event["trace"]]
+                }
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,4 +1,4 @@
-from typing import List, Optional, Any, Dict, Literal
+from typing import List, Optional, Any, Dict, Literal, Union, Annotated
 from pydantic import BaseModel, Field
 from datetime import date
 from enum import Enum
@@ -232,17 +232,17 @@ class SymptomMeasurement(BaseModel):
     rawAnswer: Optional[str] = None
 
 class SymptomEvent(BaseEvent):
-    event_type: EventType = EventType.SYMPTOM
+    event_type: Literal[EventType.SYMPTOM] = EventType.SYMPTOM
     measurements: List[SymptomMeasurement] = []
 
 class WellnessEvent(BaseEvent):
-    event_type: EventType = EventType.WELLNESS
+    event_type: Literal[EventType.WELLNESS] = EventType.WELLNESS
     mood: Optional[int] = None # 1-5
     anxiety: Optional[int] = None # 0-10
     notes: Optional[str] = None
 
 class TreatmentEvent(BaseEvent):
-    event_type: EventType = EventType.TREATMENT
+    event_type: Literal[EventType.TREATMENT] = EventType.TREATMENT
     name: str
     description: Optional[str] = None
     # date field removed, relying on BaseEvent.timestamp for ISO datetime
@@ -280,12 +280,19 @@ class LifestyleEvent(BaseEvent):
     Lifestyle events track diet, exercise, sleep, stress, travel, and other life events
     that may correlate with symptoms or wellness.
     """
-    event_type: EventType = EventType.LIFESTYLE
+    event_type: Literal[EventType.LIFESTYLE] = EventType.LIFESTYLE
     name: str = Field(..., description="Name/title of the lifestyle event")
     category: LifestyleCategory = Field(default=LifestyleCategory.OTHER, description="Category of lifestyle event")
     description: Optional[str] = Field(None, description="Detailed description")
     notes: Optional[str] = Field(None, description="Additional notes")
 
+# Patient-reported event types as a tagged union: pydantic picks the model from
+# event_type directly instead of trying each one
+Event = Annotated[
+    Union[SymptomEvent, WellnessEvent, TreatmentEvent, LifestyleEvent],
+    Field(discriminator="event_type")
+]
+
 # Agent Webhook Schemas
 
 class ToolCallRequest(BaseModel):
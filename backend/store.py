@@ -5,11 +5,12 @@ from schemas import (
     Annotation, SavedView, ViewFilters
 )
 import uuid
-import json
+import orjson
 import os
 import random
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from dateutil import parser as dateparser
 
 DATA_FILE = "patient_data.json"
@@ -23,13 +24,15 @@ class PatientStore:
         self._followup_tasks: Dict[str, List[FollowupTask]] = {} # patient_id -> list of tasks (mocked/in-memory)
         self._annotations: Dict[str, List[Annotation]] = {} # patient_id -> list of annotations
         self._saved_views: Dict[str, List[SavedView]] = {} # patient_id -> list of saved views
+        self._save_lock = threading.Lock() # agents may log events from worker threads concurrently
+        self._versions: Dict[str, int] = {} # patient_id -> bumped on every profile/event change (cache validation)
         self.load_data()
 
     def load_data(self):
         if os.path.exists(DATA_FILE):
             try:
-                with open(DATA_FILE, "r") as f:
-                    data = json.load(f)
+                with open(DATA_FILE, "rb") as f:
+                    data = orjson.loads(f.read())
                     
                     # Load Profiles
                     for pid, pdata in data.get("profiles", {}).items():
@@ -72,6 +75,11 @@ class PatientStore:
             self.create_new_profile("John Doe", is_default=True)
 
     def save_data(self):
+        # Snapshot and write under one lock so concurrent writers can't persist a stale snapshot last
+        with self._save_lock:
+            self._write_data()
+
+    def _write_data(self):
         events_dict = {}
         for pid, events in self._events.items():
             events_dict[pid] = [e.dict() for e in events]
@@ -92,8 +100,17 @@ class PatientStore:
             "saved_views": views_dict,
             "active_profile_id": self._active_profile_id
         }
-        with open(DATA_FILE, "w") as f:
-            json.dump(data, f, indent=2, default=str)
+        # orjson encodes datetimes and enums natively (ISO 8601 / their values)
+        payload = orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        with open(DATA_FILE, "wb") as f:
+            f.write(payload)
+
+    def _touch(self, patient_id: str):
+        self._versions[patient_id] = self._versions.get(patient_id, 0) + 1
+
+    def get_patient_version(self, patient_id: str) -> int:
+        """Counter that changes whenever a patient's profile or events change."""
+        return self._versions.get(patient_id, 0)
 
     def list_profiles(self) -> List[PatientProfile]:
         return list(self._profiles.values())
@@ -110,6 +127,7 @@ class PatientStore:
             del self._profiles[profile_id]
             if profile_id in self._events:
                 del self._events[profile_id]
+            self._touch(profile_id)
             
             # If we deleted the active profile, switch to another one if available
             if self._active_profile_id == profile_id:
@@ -131,6 +149,7 @@ class PatientStore:
         self._profiles[profile.id] = profile
         self._active_profile_id = profile.id
         self._events[profile.id] = events
+        self._touch(profile.id)
         self.save_data()
         return profile
 
@@ -187,6 +206,7 @@ class PatientStore:
         self._active_profile_id = new_id
         # Init events list
         self._events[new_id] = []
+        self._touch(new_id)
         self.save_data()
         return profile
 
@@ -197,6 +217,7 @@ class PatientStore:
             self._active_profile_id = profile.id
         if profile.id not in self._events:
             self._events[profile.id] = []
+        self._touch(profile.id)
         self.save_data()
         return profile
 
@@ -224,6 +245,27 @@ class PatientStore:
 
     # Event Methods
     def add_event(self, event_data: dict) -> BaseEvent:
+        event = self.append_event(event_data)
+        self.save_data()
+        return event
+
+    def add_events(self, events_data: List[dict]) -> List[BaseEvent]:
+        """
+        Add several events with a single write to disk. Each event is built
+        on its own, so an invalid one is skipped without dropping the rest.
+        """
+        events = []
+        for event_data in events_data:
+            try:
+                events.append(self.append_event(event_data))
+            except Exception as e:
+                print(f"Error adding event {event_data.get('id')}: {e}")
+        if events:
+            self.save_data()
+        return events
+
+    def append_event(self, event_data: dict) -> BaseEvent:
+        """Add an event in memory only; the caller persists it with save_data()."""
         patient_id = event_data.get("patient_id")
         if not patient_id:
             raise ValueError("Patient ID required")
@@ -247,7 +289,7 @@ class PatientStore:
             event = BaseEvent(**event_data)
             
         self._events[patient_id].append(event)
-        self.save_data()
+        self._touch(patient_id)
         return event
 
     def get_events(self, patient_id: str) -> List[BaseEvent]:
@@ -260,6 +302,7 @@ class PatientStore:
             for i, event in enumerate(events):
                 if event.id == event_id:
                     self._events[pid].pop(i)
+                    self._touch(pid)
                     self.save_data()
                     return True
         return False
@@ -303,6 +346,22 @@ class PatientStore:
         
         return sorted(filtered, key=lambda x: x.timestamp, reverse=True)
 
+    def get_checkin_bundle(
+        self,
+        patient_id: str,
+        window_hours: int = 168
+    ) -> Tuple[Optional[PatientProfile], List[BaseEvent]]:
+        """
+        Get a patient's profile and recent events in one call.
+        
+        Check-in question precompute needs both; keeping them behind a single
+        store call means one round-trip if the store moves to a database.
+        
+        Returns:
+            (profile or None, events within the window, newest first)
+        """
+        return self.get_profile(patient_id), self.get_recent_events(patient_id, window_hours=window_hours)
+
     # Followup Task Methods (Mocked - In-Memory Only)
     
     def add_followup_task(self, task: FollowupTask) -> FollowupTask: